@@ -0,0 +1,88 @@
+import asyncio
+import math
+import os
+
+# -------------------------------------------------
+# ADMISSION CONTROL: bounded concurrency with a bounded queue
+# -------------------------------------------------
+
+class AdmissionRejected(Exception):
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is at capacity")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+
+    def __init__(self, name, max_concurrent, max_queue, max_wait_s):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.waiting = 0
+        self.active = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @property
+    def retry_after(self):
+        return max(1, math.ceil(self.max_wait_s))
+
+    async def acquire(self):
+        # Queue full: fail fast instead of piling more work onto Postgres
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.name, self.retry_after)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait_s)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected(self.name, self.retry_after)
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+def limiter_from_env(name, max_concurrent, max_queue, max_wait_s):
+    # ADMISSION_<NAME>="<max_concurrent>,<max_queue>,<max_wait_s>" overrides the defaults
+    override = os.getenv(f"ADMISSION_{name.upper()}")
+    if override:
+        concurrent, queue, wait = override.split(",")
+        max_concurrent, max_queue, max_wait_s = int(concurrent), int(queue), float(wait)
+    return AdmissionLimiter(name, max_concurrent, max_queue, max_wait_s)
+
+
+# Keyed by the first path segment; the latency-sensitive /customer path gets the most room
+LIMITERS = {
+    "customer": limiter_from_env("customer", 32, 64, 2.0),
+    "balance": limiter_from_env("balance", 32, 64, 2.0),
+    "branch": limiter_from_env("branch", 6, 12, 5.0),
+    "region": limiter_from_env("region", 2, 4, 5.0),
+    "branches": limiter_from_env("branches", 8, 16, 2.0),
+    "cities": limiter_from_env("cities", 8, 16, 2.0),
+    "timeseries": limiter_from_env("timeseries", 6, 12, 5.0),
+    "alerts": limiter_from_env("alerts", 2, 4, 5.0),
+}
+
+
+def limiter_for_path(path):
+    return LIMITERS.get(path.strip("/").split("/", 1)[0])
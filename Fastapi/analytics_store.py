@@ -0,0 +1,237 @@
+import argparse
+import glob
+import os
+import threading
+
+import duckdb
+import pandas as pd
+
+from Fastapi.db import db_connection, shard_count
+
+# -------------------------------------------------
+# COLUMNAR ANALYTICS SNAPSHOT (Parquet files queried with in-process DuckDB)
+#
+#   transactions_<seq>.parquet  append-only, one file per refresh (rows with id above each
+#                               shard's watermark; ids are only unique within a shard)
+#   accounts.parquet            one row per account: branch, city and latest closing balance,
+#                               rewritten on every refresh (small next to transactions)
+#
+# Files are written under a temporary name and renamed into place, so API readers
+# never see a partial file and never wait on the writer.
+# -------------------------------------------------
+
+SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR", "analytics_snapshot")
+
+# Merge append files into one once there are more than this many
+MAX_TRANSACTION_FILES = int(os.getenv("ANALYTICS_MAX_FILES", 64))
+
+TRANSACTION_COLUMNS = ["id", "account_number", "transaction_date", "debit_amount", "credit_amount"]
+ACCOUNT_COLUMNS = ["account_number", "branch", "city", "closing_balance"]
+
+
+def _path(name):
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+def _transaction_files():
+    return sorted(glob.glob(_path("transactions_*.parquet")))
+
+
+def snapshot_exists():
+    return os.path.exists(_path("accounts.parquet")) and bool(_transaction_files())
+
+
+def _write_parquet(con, relation_sql, name):
+    tmp = _path(name + ".tmp")
+    con.execute(f"COPY ({relation_sql}) TO '{tmp}' (FORMAT parquet)")
+    os.replace(tmp, _path(name))
+
+# -------------------------------------------------
+# REFRESH (called after each run_extraction commit)
+# -------------------------------------------------
+
+def _sequence(files):
+    # Sequence number of the newest file, from its name
+    return int(os.path.basename(files[-1])[len("transactions_"):-len(".parquet")]) if files else 0
+
+
+def _watermark(con):
+    files = _transaction_files()
+    if not files:
+        return {}, 0
+    max_ids = dict(con.execute(
+        f"SELECT shard, MAX(id) FROM read_parquet({files!r}) GROUP BY shard").fetchall())
+    return max_ids, _sequence(files)
+
+
+def _fetch_frame(pg_cursor, columns, chunk_size=200000):
+    frames = []
+    while True:
+        rows = pg_cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        frames.append(pd.DataFrame(rows, columns=columns))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def refresh_snapshot(full=False):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    con = duckdb.connect()
+
+    # A full refresh reads everything again; the old files go once the new one is in place
+    # The old files are not read: they may predate the current layout (e.g. no shard column)
+    if full:
+        replaced = _transaction_files()
+        max_ids, seq = {}, _sequence(replaced)
+    else:
+        replaced = []
+        max_ids, seq = _watermark(con)
+
+    new_frames = []
+    account_frames = []
+
+    for shard in range(shard_count()):
+        pg_conn = db_connection(shard)
+
+        # New transactions since the last refresh
+        cursor = pg_conn.cursor(name="analytics_snapshot_scan")
+        cursor.execute("""
+            SELECT id, account_number, transaction_date, debit_amount::float8, credit_amount::float8
+            FROM transactions
+            WHERE id > %s
+            ORDER BY id
+            """, (max_ids.get(shard, 0),), name="analytics.new_transactions")
+        new_frames.append(_fetch_frame(cursor, TRANSACTION_COLUMNS).assign(shard=shard))
+        cursor.close()
+
+        # Account dimension with the latest closing balance
+        cursor = pg_conn.cursor(name="analytics_accounts_scan")
+        cursor.execute("""
+            SELECT a.account_number, b.name AS branch, c.name AS city,
+            s.closing_balance::float8
+            FROM account_info a
+            LEFT JOIN branches b
+            ON b.id = a.branch_id
+            LEFT JOIN cities c
+            ON c.id = b.city_id
+            LEFT JOIN account_summary_current s
+            ON s.account_number = a.account_number
+            """, name="analytics.accounts")
+        account_frames.append(_fetch_frame(cursor, ACCOUNT_COLUMNS))
+        cursor.close()
+        pg_conn.close()
+
+    # Empty (untyped) frames would turn numeric columns into objects in the concat
+    new_transactions = pd.concat([f for f in new_frames if not f.empty] or new_frames[:1], ignore_index=True)
+    accounts = pd.concat([f for f in account_frames if not f.empty] or account_frames[:1], ignore_index=True)
+
+    if not new_transactions.empty:
+        con.register("new_transactions", new_transactions)
+        _write_parquet(con, "SELECT * FROM new_transactions", f"transactions_{seq + 1:06d}.parquet")
+
+    con.register("accounts", accounts)
+    _write_parquet(con, "SELECT * FROM accounts", "accounts.parquet")
+
+    for f in replaced:
+        os.remove(f)
+
+    if len(_transaction_files()) > MAX_TRANSACTION_FILES:
+        compact(con)
+
+    con.close()
+    print(f"Analytics snapshot refreshed: {len(new_transactions)} new transactions, {len(accounts)} accounts")
+
+
+def compact(con):
+    files = _transaction_files()
+    # The merged file takes the last file's name (so the next append sorts after it) in one
+    # rename; the other parts are removed only after that, so readers never find no files
+    _write_parquet(con, f"SELECT * FROM read_parquet({files!r}) ORDER BY shard, id",
+                   os.path.basename(files[-1]))
+    for f in files[:-1]:
+        os.remove(f)
+    print(f"Compacted {len(files)} transaction files")
+
+# -------------------------------------------------
+# QUERY SIDE
+# -------------------------------------------------
+
+_local = threading.local()
+
+
+def _connection():
+    # One DuckDB connection per API worker thread; views re-read the file list on every query
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = duckdb.connect()
+        con.execute(f"CREATE VIEW transactions AS SELECT * FROM read_parquet('{_path('transactions_*.parquet')}')")
+        con.execute(f"CREATE VIEW accounts AS SELECT * FROM read_parquet('{_path('accounts.parquet')}')")
+        _local.con = con
+    return con
+
+
+def branch_dashboard(branch_name):
+    con = _connection()
+
+    total_customers, total_debits, total_credits = con.execute("""
+        SELECT COUNT(DISTINCT t.account_number), SUM(t.debit_amount), SUM(t.credit_amount)
+        FROM transactions t
+        JOIN accounts a ON t.account_number = a.account_number
+        WHERE a.branch = ?
+        """, [branch_name]).fetchone()
+
+    avg_balance, negative_balance_ratio = con.execute("""
+        SELECT AVG(closing_balance),
+        COUNT(*) FILTER (WHERE closing_balance < 0) * 100.0 / NULLIF(COUNT(closing_balance), 0)
+        FROM accounts
+        WHERE branch = ?
+        """, [branch_name]).fetchone()
+
+    monthly = con.execute("""
+        SELECT DATE_TRUNC('month', t.transaction_date) AS month,
+        COUNT(*) AS transaction_count,
+        SUM(t.credit_amount) AS monthly_deposits
+        FROM transactions t
+        JOIN accounts a ON t.account_number = a.account_number
+        WHERE a.branch = ?
+        GROUP BY month
+        ORDER BY month
+        """, [branch_name]).fetchall()
+
+    return {
+        "total_customers": total_customers,
+        "total_credits": total_credits,
+        "total_debits": total_debits,
+        "average_balance": avg_balance,
+        "transaction_velocity": [(month, count) for month, count, _ in monthly],
+        "negative_balance_ratio": negative_balance_ratio or 0,
+        "growth_rate": [(month, deposits) for month, _, deposits in monthly],
+    }
+
+
+def region_dashboard(city):
+    con = _connection()
+
+    branch_count = con.execute("SELECT COUNT(DISTINCT branch) FROM accounts").fetchone()[0]
+
+    branch_comparison = con.execute("""
+        SELECT branch, SUM(closing_balance) AS total_deposits
+        FROM accounts
+        WHERE closing_balance IS NOT NULL
+        GROUP BY branch
+        ORDER BY total_deposits DESC
+        """).fetchall()
+
+    return {
+        "branch_count": branch_count,
+        "branch_comparison": branch_comparison,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the columnar analytics snapshot from Postgres.")
+    parser.add_argument("--full", action="store_true", help="Rebuild from scratch (e.g. after deduping history)")
+    args = parser.parse_args()
+    refresh_snapshot(full=args.full)
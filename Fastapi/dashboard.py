@@ -1,12 +1,102 @@
-from Fastapi.db import db_connection
+import os
+import time
+from datetime import date, timedelta
+from Fastapi.db import scatter, run_on_shard, shard_for_account
+from Fastapi.downsample import lttb
+from Fastapi.metrics import record_query
+
+# "postgres" runs the manager dashboards on the OLTP tables, "columnar" serves them
+# from the Parquet/DuckDB snapshot (Fastapi/analytics_store.py) when one exists
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "postgres")
+
+if ANALYTICS_ENGINE == "columnar":
+    import duckdb
+    from Fastapi import analytics_store
+
+# -------------------------------------------------
+# Per-query statement_timeout budgets (ms). Aggregate-heavy manager queries get a
+# bounded budget so they cannot hold Postgres backends needed by /customer.
+# -------------------------------------------------
+QUERY_TIMEOUTS_MS = {
+    "customer": int(os.getenv("QUERY_TIMEOUT_CUSTOMER_MS", 2000)),
+    "dropdown": int(os.getenv("QUERY_TIMEOUT_DROPDOWN_MS", 2000)),
+    "branch": int(os.getenv("QUERY_TIMEOUT_BRANCH_MS", 5000)),
+    "region": int(os.getenv("QUERY_TIMEOUT_REGION_MS", 8000)),
+    "timeseries": int(os.getenv("QUERY_TIMEOUT_TIMESERIES_MS", 5000)),
+}
+
+# Run a manager dashboard on the columnar snapshot; None means fall back to Postgres
+def from_columnar_store(dashboard, *args):
+    if ANALYTICS_ENGINE != "columnar" or not analytics_store.snapshot_exists():
+        return None
+
+    start = time.perf_counter()
+    try:
+        return getattr(analytics_store, f"{dashboard}_dashboard")(*args)
+    except duckdb.Error as e:
+        print(f"Columnar {dashboard} dashboard failed, falling back to Postgres: {e}")
+        return None
+    finally:
+        record_query(f"columnar.{dashboard}", (time.perf_counter() - start) * 1000, 0)
+
+# -------------------------------------------------
+# Sketch roll-ups: active customers and balance percentiles merged from
+# branch_month_sketches (one row per branch per month), independent of history size
+# -------------------------------------------------
+def fetch_sketches(cursor, where, params, name, timeout_ms):
+    cursor.execute(f"""
+        SELECT month, customers_hll, balance_digest
+        FROM branch_month_sketches
+        WHERE {where}
+        ORDER BY month
+        """, params, name=name, timeout_ms=timeout_ms)
+    return cursor.fetchall()
+
+# [(month, active_customers, median_balance, p90_balance)], branches merged per month
+def monthly_customer_stats(sketch_rows):
+    # numpy is loaded with the first sketch merge, not at API startup
+    from Fastapi.sketches import sketch_summary
+
+    by_month = {}
+    for month, hll_bytes, digest in sketch_rows:
+        by_month.setdefault(month, []).append((hll_bytes, digest))
+
+    # Shards answer in turn, so the months arrive once per shard; chart them in order
+    stats = []
+    for month, rows in sorted(by_month.items()):
+        summary = sketch_summary(rows)
+        stats.append((month, summary["active_customers"], summary["median_balance"], summary["p90_balance"]))
+    return stats
+
+# -------------------------------------------------
+# Shard merge helpers: per-shard results from scatter() combined into one answer
+# -------------------------------------------------
+def fetch_rows(cursor, query, params, name, timeout_ms):
+    cursor.execute(query, params, name=name, timeout_ms=timeout_ms)
+    return cursor.fetchall()
+
+def gather(per_shard_rows):
+    return [row for rows in per_shard_rows for row in rows]
+
+def sum_or_none(values):
+    values = [v for v in values if v is not None]
+    return sum(values) if values else None
+
+# [(key, value)] from every shard, summed per key and sorted by key
+def merge_sums(per_shard_rows):
+    totals = {}
+    for key, value in gather(per_shard_rows):
+        totals[key] = totals.get(key, 0) + (value or 0)
+    return sorted(totals.items())
 
 # -------------------------------------------------
 # Customer Dashboard: Provides detailed insights for individual customers based on their account number.
 # -------------------------------------------------
 def customer_dashboard(account_number):
+    return run_on_shard(shard_for_account(account_number), customer_details, account_number)
+
 
-    conn = db_connection()
-    cursor = conn.cursor()
+def customer_details(cursor, account_number):
 
     # Fetch accoount information
     cursor.execute("""
@@ -14,7 +104,7 @@ def customer_dashboard(account_number):
             holder_name, account_type, branch, statement_period
             FROM account_info
             WHERE account_number = %s
-            """, (account_number,))
+            """, (account_number,), name="customer.account_info", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
     
     acc_info = cursor.fetchone()
 
@@ -26,13 +116,14 @@ def customer_dashboard(account_number):
     else:
         return {"Account not found..!"}
 
-    # Fetch account summary
+    # Fetch account summary (latest statement)
     cursor.execute("""
         SELECT
-            opening_balance, closing_balance, total_credits, total_debits, total_transactions
-            FROM account_summary
+            opening_balance, closing_balance, total_credits, total_debits, total_transactions,
+            statement_period
+            FROM account_summary_current
             WHERE account_number = %s
-            """, (account_number,))
+            """, (account_number,), name="customer.account_summary", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
     
     acc_summary = cursor.fetchone()
     
@@ -42,6 +133,7 @@ def customer_dashboard(account_number):
         total_credits = acc_summary[2]
         total_debits = acc_summary[3]
         total_transactions = acc_summary[4]
+        statement_period = acc_summary[5] or statement_period
     else:
         return {"Account summary not available..!"}
     
@@ -52,7 +144,7 @@ def customer_dashboard(account_number):
         FROM transactions
         WHERE account_number = %s
         GROUP BY category
-        """, (account_number,))
+        """, (account_number,), name="customer.category_spend", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
     
     category_details = cursor.fetchall()
 
@@ -65,7 +157,7 @@ def customer_dashboard(account_number):
         WHERE account_number = %s
         GROUP BY month
         ORDER BY month
-        """, (account_number,))
+        """, (account_number,), name="customer.monthly_spend", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
     
     monthly_spend = cursor.fetchall()
 
@@ -76,20 +168,26 @@ def customer_dashboard(account_number):
     if total_credits > 0:
         savings_rate = (net_cash_flow / total_credits) * 100
 
-    # Alerts for account
-    alerts = []
+    # Alerts for account (precomputed bank-wide by jobs/alert_engine.py)
+    cursor.execute("""
+        SELECT message
+        FROM account_alerts
+        WHERE account_number = %s
+        ORDER BY rule_order
+        """, (account_number,), name="customer.alerts", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
 
-    if closing_balance <0:
-        alerts.append("Negative Balance Warning: Your account is overdrawn. Please deposit funds to avoid penalties.")
-    
-    if total_debits > total_credits:
-        alerts.append("High Spending Alert: Your outgoing transactions exceed your incoming transactions. Consider reviewing your spending habits.")
+    alerts = [row[0] for row in cursor.fetchall()]
 
-    if savings_rate < 10:
-        alerts.append("Low Savings Rate: Your savings rate is below 10%. Consider increasing your savings to build a stronger financial future.")
-    
-    cursor.close()
-    conn.close()
+    # Recurring payments (precomputed bank-wide by jobs/recurring_payments.py)
+    cursor.execute("""
+        SELECT merchant, category, frequency, average_amount, last_date, next_expected
+        FROM recurring_payments
+        WHERE account_number = %s
+        ORDER BY average_amount DESC
+        """, (account_number,), name="customer.recurring_payments", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
+
+    recurring_columns = ["merchant", "category", "frequency", "average_amount", "last_date", "next_expected"]
+    recurring_payments = [dict(zip(recurring_columns, row)) for row in cursor.fetchall()]
 
     return {
         "customer_name": cust_name,
@@ -105,164 +203,466 @@ def customer_dashboard(account_number):
         "savings_rate_percent": round(savings_rate, 2),
         "category_details": category_details,
         "monthly_spend": monthly_spend,
-        "alerts": alerts
+        "alerts": alerts,
+        "recurring_payments": recurring_payments
     }
 
 # Fetch all branches for dropdown
 def branch():
-    conn = db_connection()
-    cursor = conn.cursor()
+    rows = run_on_shard(0, fetch_rows, """
+        SELECT name
+        FROM branches
+        ORDER BY name
+        """, None, "branches.list", QUERY_TIMEOUTS_MS["dropdown"])
 
-    cursor.execute("""
-        SELECT DISTINCT branch
-        FROM account_info
-        """)
-    
-    branches = [row[0] for row in cursor.fetchall()]
-
-    cursor.close()
-    conn.close()
-
-    return branches
+    return [row[0] for row in rows]
 
 
 # -------------------------------------------------
 # Branch Dashboard: Provides aggregated insights for a specific branch, including customer count, transaction volumes, and growth trends.
+# Each shard computes partial aggregates for its own accounts; they are merged here.
 # -------------------------------------------------
-def branch_dashboard(branch_name):
-
-    conn = db_connection()
-    cursor = conn.cursor()
+def branch_partials(cursor, branch_name, read_accounts):
+    timeout_ms = QUERY_TIMEOUTS_MS["branch"]
 
-    # Fetch Branch information
+    # Sketches with their monthly totals (sql/011); totals are NULL on rows built before it
     cursor.execute("""
-        SELECT COUNT(DISTINCT t.account_number) AS total_customers,
-        SUM(t.debit_amount) AS total_debits,
-        SUM(t.credit_amount) AS total_credits
-        FROM transactions t
-        JOIN account_info a 
-        ON t.account_number = a.account_number
-        WHERE a.branch = %s
-        """, (branch_name,)) 
-    
-    results = cursor.fetchone()
+        SELECT month, customers_hll, balance_digest, transaction_count, debits, credits
+        FROM branch_month_sketches
+        WHERE branch = %s
+        ORDER BY month
+        """, (branch_name,), name="branch.sketches", timeout_ms=timeout_ms)
 
-    total_customers = results[0] if results else 0
-    total_debits = results[1] if results else 0
-    total_credits = results[2] if results else 0
+    sketches = cursor.fetchall()
+    partials = {"sketches": [(month, hll, digest) for month, hll, digest, _, _, _ in sketches]}
 
-    # Fetch average balance across all accounts
+    # The columnar snapshot answers the rest
+    if not read_accounts:
+        return partials
+
+    # Balance sum/count and negative balances (latest statement per account);
+    # branch ids are the same on every shard
     cursor.execute("""
-        SELECT AVG(s.closing_balance) 
-        FROM account_summary s
+        SELECT SUM(s.closing_balance), COUNT(s.closing_balance),
+        COUNT(*) FILTER (WHERE s.closing_balance < 0), COUNT(*)
+        FROM account_summary_current s
         JOIN account_info a 
         ON s.account_number = a.account_number
-        WHERE a.branch = %s
-        """, (branch_name,))
-    
-    avg_balance = cursor.fetchone()[0]
+        WHERE a.branch_id = (SELECT id FROM branches WHERE name = %s)
+        """, (branch_name,), name="branch.balances", timeout_ms=timeout_ms)
+
+    balance_sum, balance_count, negative_count, account_count = cursor.fetchone()
+
+    partials.update({
+        "balance_sum": balance_sum,
+        "balance_count": balance_count,
+        "negative_count": negative_count,
+        "account_count": account_count,
+    })
+
+    # Once every month of the shard has totals, they replace the scans of its history;
+    # its customers are then counted from the merged HyperLogLog (total_customers None)
+    if sketches and all(row[3] is not None for row in sketches):
+        return {
+            **partials,
+            "total_debits": sum_or_none(row[4] for row in sketches),
+            "total_credits": sum_or_none(row[5] for row in sketches),
+            "total_customers": None,
+            "velocity": [(month, count) for month, _, _, count, _, _ in sketches],
+            "deposits": [(month, credits) for month, _, _, _, _, credits in sketches],
+        }
 
-    # Fetch Transaction Velocity (number of transactions per month)
+    # Fetch Branch information
     cursor.execute("""
-        SELECT DATE_TRUNC('month', t.transaction_date) AS month, 
-        COUNT(*) AS transaction_count
+        SELECT SUM(t.debit_amount) AS total_debits,
+        SUM(t.credit_amount) AS total_credits
         FROM transactions t
         JOIN account_info a 
         ON t.account_number = a.account_number
-        WHERE a.branch = %s
-        GROUP BY month
-        ORDER BY month
-        """, (branch_name,))
-    
-    transaction_velocity = cursor.fetchall()
+        WHERE a.branch_id = (SELECT id FROM branches WHERE name = %s)
+        """, (branch_name,), name="branch.totals", timeout_ms=timeout_ms)
+
+    total_debits, total_credits = cursor.fetchone()
 
-    # Fetch Negative Balance Ratio
+    # Accounts live on exactly one shard, so per-shard distinct counts add up
     cursor.execute("""
-        SELECT COUNT(*) FILTER (WHERE s.closing_balance < 0) * 100.0 / COUNT(*)
-        FROM account_summary s
+        SELECT COUNT(DISTINCT t.account_number)
+        FROM transactions t
         JOIN account_info a
-        ON s.account_number = a.account_number
-        WHERE a.branch = %s
-        """, (branch_name,))
-
-    negative_balance_ratio = cursor.fetchone()[0] or 0
+        ON t.account_number = a.account_number
+        WHERE a.branch_id = (SELECT id FROM branches WHERE name = %s)
+        """, (branch_name,), name="branch.total_customers", timeout_ms=timeout_ms)
+    total_customers = cursor.fetchone()[0]
 
-    # Fetch Growth Rate (month-over-month)
+    # Transaction Velocity (transactions per month) and monthly deposits
     cursor.execute("""
-        SELECT DATE_TRUNC('month', t.transaction_date) AS month,
-                SUM(t.credit_amount) AS monthly_deposits
+        SELECT DATE_TRUNC('month', t.transaction_date)::date AS month,
+        COUNT(*) AS transaction_count,
+        SUM(t.credit_amount) AS monthly_deposits
         FROM transactions t
-        JOIN account_info a
+        JOIN account_info a 
         ON t.account_number = a.account_number
-        WHERE a.branch = %s
+        WHERE a.branch_id = (SELECT id FROM branches WHERE name = %s)
         GROUP BY month
-        ORDER BY month
-        """, (branch_name,))
+        """, (branch_name,), name="branch.monthly", timeout_ms=timeout_ms)
 
-    growth_rate = cursor.fetchall()           
+    monthly = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
+    return {
+        **partials,
+        "total_debits": total_debits,
+        "total_credits": total_credits,
+        "total_customers": total_customers,
+        "velocity": [(month, count) for month, count, _ in monthly],
+        "deposits": [(month, deposits) for month, _, deposits in monthly],
+    }
+
+def branch_dashboard(branch_name):
+    columnar = from_columnar_store("branch", branch_name)
+
+    # One connection per shard for all of its reads. Every shard keeps sketches for
+    # its own accounts; merging handles the overlap
+    partials = scatter(branch_partials, branch_name, columnar is None)
+    sketch_rows = gather(p["sketches"] for p in partials)
+    customer_stats = monthly_customer_stats(sketch_rows)
+
+    if columnar is not None:
+        return {**columnar, "monthly_customer_stats": customer_stats}
+
+    total_customers = sum(p["total_customers"] for p in partials if p["total_customers"] is not None)
+    sketched = gather(p["sketches"] for p in partials if p["total_customers"] is None)
+    if sketched:
+        from Fastapi.sketches import merge_sketches
+        total_customers += merge_sketches([(hll, digest) for _, hll, digest in sketched])[0].count()
+
+    total_credits = sum_or_none(p["total_credits"] for p in partials)
+    total_debits = sum_or_none(p["total_debits"] for p in partials)
+    velocity = merge_sums(p["velocity"] for p in partials)
+    deposits = merge_sums(p["deposits"] for p in partials)
+
+    balance_count = sum(p["balance_count"] for p in partials)
+    account_count = sum(p["account_count"] for p in partials)
+    balance_sum = sum_or_none(p["balance_sum"] for p in partials)
+
+    avg_balance = balance_sum / balance_count if balance_count else None
+    negative_balance_ratio = (sum(p["negative_count"] for p in partials) * 100.0 / account_count
+                              if account_count else 0)
 
     return {
         "total_customers": total_customers,
         "total_credits": total_credits,
         "total_debits": total_debits,
         "average_balance": avg_balance,
-        "transaction_velocity": transaction_velocity,
+        "transaction_velocity": velocity,
         "negative_balance_ratio": negative_balance_ratio,
-        "growth_rate": growth_rate
+        "growth_rate": deposits,
+        "monthly_customer_stats": customer_stats
     }
 
 # Fetch all Cities for dropdown
 def city():
-    conn = db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT DISTINCT SPLIT_PART(branch, ' - ', 1) AS city
-        FROM account_info
-        ORDER BY city;
-        """)
-    
-    cities = [row[0] for row in cursor.fetchall()]
-
-    cursor.close()
-    conn.close()
+    rows = run_on_shard(0, fetch_rows, """
+        SELECT name
+        FROM cities
+        ORDER BY name
+        """, None, "cities.list", QUERY_TIMEOUTS_MS["dropdown"])
 
-    return cities
+    return [row[0] for row in rows]
 
 
 # -------------------------------------------------
 # Region Dashboard: Provides Region level insights
 # -------------------------------------------------
-def region_dashboard(city):
+def region_partials(cursor, city, read_accounts):
+    timeout_ms = QUERY_TIMEOUTS_MS["region"]
+
+    # City series merges the city's branch sketches per month; bank-wide figures
+    # merge every branch for the latest month
+    partials = {
+        "city_sketches": fetch_sketches(cursor, """branch IN (
+            SELECT b.name FROM branches b JOIN cities c ON c.id = b.city_id WHERE c.name = %s)""", (city,),
+                                        "region.city_sketches", timeout_ms),
+        "bank_sketches": fetch_sketches(cursor, "month = (SELECT MAX(month) FROM branch_month_sketches)", None,
+                                        "region.bank_sketches", timeout_ms),
+    }
 
-    conn = db_connection()
-    cursor = conn.cursor()
+    # The columnar snapshot answers the rest
+    if not read_accounts:
+        return partials
 
     # Branch count in the city
     cursor.execute("""
-        SELECT COUNT(DISTINCT branch)
-        FROM account_info
-        """)
-    branch_count = cursor.fetchone()[0]
+        SELECT COUNT(*)
+        FROM branches
+        """, name="region.branch_count", timeout_ms=timeout_ms)
+    partials["branch_count"] = cursor.fetchone()[0]
 
-    # Branch Comparision
+    # Branch Comparision (deposits per branch on this shard)
     cursor.execute("""
-        SELECT a.branch, SUM(s.closing_balance) AS total_deposits
-        FROM account_summary s
+        SELECT b.name, SUM(s.closing_balance) AS total_deposits
+        FROM account_summary_current s
         JOIN account_info a
         ON s.account_number = a.account_number
-        GROUP BY a.branch
-        ORDER BY total_deposits DESC
-        """)
-    branch_comparison = cursor.fetchall()
+        JOIN branches b
+        ON b.id = a.branch_id
+        GROUP BY b.name
+        """, name="region.branch_comparison", timeout_ms=timeout_ms)
+    partials["deposits"] = cursor.fetchall()
+
+    return partials
+
+def region_dashboard(city):
+    columnar = from_columnar_store("region", city)
+
+    # One connection per shard for all of its reads
+    partials = scatter(region_partials, city, columnar is None)
+    city_sketches = gather(p["city_sketches"] for p in partials)
+    bank_sketches = gather(p["bank_sketches"] for p in partials)
 
-    cursor.close()
-    conn.close()
+    # Each shard answers with its own latest month; keep the newest
+    if bank_sketches:
+        latest_month = max(month for month, _, _ in bank_sketches)
+        bank_sketches = [row for row in bank_sketches if row[0] == latest_month]
+
+    customer_stats = {
+        "monthly_customer_stats": monthly_customer_stats(city_sketches),
+        "bank_customer_stats": monthly_customer_stats(bank_sketches),
+    }
+
+    if columnar is not None:
+        return {**columnar, **customer_stats}
+
+    # Shard 0 assigns branch ids and holds every branch; the others copy them as needed
+    branch_count = max(p["branch_count"] for p in partials)
+
+    # Deposits summed per branch across shards
+    deposits = merge_sums(p["deposits"] for p in partials)
+    branch_comparison = sorted(deposits, key=lambda row: row[1], reverse=True)
 
     return{
         "branch_count": branch_count,
-        "branch_comparison": branch_comparison
-    }
\ No newline at end of file
+        "branch_comparison": branch_comparison,
+        **customer_stats
+    }
+
+
+# -------------------------------------------------
+# Time Series: transaction metrics for an account, branch or city at day/week/month
+# granularity, aggregated in SQL and downsampled (LTTB) to a max-points budget.
+# -------------------------------------------------
+TIMESERIES_METRICS = {
+    "transactions": "COUNT(*)",
+    "deposits": "COALESCE(SUM(t.credit_amount), 0)",
+    "withdrawals": "COALESCE(SUM(t.debit_amount), 0)",
+}
+
+TIMESERIES_SCOPES = {
+    "account": "t.account_number = %s",
+    "branch": "a.branch_id = (SELECT id FROM branches WHERE name = %s)",
+    "city": "a.branch_id IN (SELECT b.id FROM branches b JOIN cities c ON c.id = b.city_id WHERE c.name = %s)",
+}
+
+# Most buckets returned per series once empty buckets are filled in; the latest are kept
+MAX_TIMESERIES_BUCKETS = int(os.getenv("MAX_TIMESERIES_BUCKETS", 3660))
+
+def transaction_timeseries(scope, key, metric="deposits", granularity="month",
+                           max_points=500, start_date=None, end_date=None):
+
+    filters = [TIMESERIES_SCOPES[scope]]
+    params = [granularity, key]
+
+    if start_date:
+        filters.append("t.transaction_date >= %s")
+        params.append(start_date)
+    if end_date:
+        filters.append("t.transaction_date <= %s")
+        params.append(end_date)
+
+    query = f"""
+        SELECT DATE_TRUNC(%s, t.transaction_date)::date AS bucket,
+        {TIMESERIES_METRICS[metric]} AS value
+        FROM transactions t
+        JOIN account_info a
+        ON t.account_number = a.account_number
+        WHERE {" AND ".join(filters)}
+        GROUP BY bucket
+        """
+    args = (query, params, f"timeseries.{scope}", QUERY_TIMEOUTS_MS["timeseries"])
+
+    # An account lives on one shard; branches and cities span all of them (every metric is additive)
+    if scope == "account":
+        rows = merge_sums([run_on_shard(shard_for_account(key), fetch_rows, *args)])
+    else:
+        rows = merge_sums(scatter(fetch_rows, *args))
+
+    # Buckets without transactions are zeros, not gaps for the line to bridge
+    if rows:
+        values = dict(rows)
+        first_bucket = truncate_bucket(start_date, granularity) if start_date else rows[0][0]
+        last_bucket = truncate_bucket(end_date, granularity) if end_date else rows[-1][0]
+        rows = [(bucket, values.get(bucket, 0)) for bucket in bucket_starts(first_bucket, last_bucket, granularity)]
+
+    points = lttb([(bucket.toordinal(), float(value)) for bucket, value in rows], max_points)
+
+    return {
+        "scope": scope,
+        "key": key,
+        "metric": metric,
+        "granularity": granularity,
+        "raw_points": len(rows),
+        "downsampled": len(points) < len(rows),
+        "points": [(bucket_from_ordinal(x), y) for x, y in points],
+    }
+
+def bucket_from_ordinal(ordinal):
+    return date.fromordinal(int(ordinal)).isoformat()
+
+# Start of the bucket holding a date, as DATE_TRUNC computes it (weeks start on Monday)
+def truncate_bucket(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def bucket_count(first, last, granularity):
+    first, last = truncate_bucket(first, granularity), truncate_bucket(last, granularity)
+    if granularity == "month":
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days // (7 if granularity == "week" else 1) + 1
+
+# Every bucket start from first to last; counted in months or days so nothing steps past date.max
+def bucket_starts(first, last, granularity):
+    if granularity == "month":
+        months = range(first.year * 12 + first.month - 1, last.year * 12 + last.month)
+        return [date(m // 12, m % 12 + 1, 1) for m in months[-MAX_TIMESERIES_BUCKETS:]]
+    days = range(first.toordinal(), last.toordinal() + 1, 7 if granularity == "week" else 1)
+    return [date.fromordinal(d) for d in days[-MAX_TIMESERIES_BUCKETS:]]
+
+
+# -------------------------------------------------
+# Balances: balance as of a date and a daily balance curve, read from the running
+# balance stored per transaction (index-only scans on idx_transactions_account_date)
+# -------------------------------------------------
+
+# Longest daily balance curve built per request; the days are filled in one by one
+MAX_DAILY_BALANCE_DAYS = int(os.getenv("MAX_DAILY_BALANCE_DAYS", 3660))
+
+def balance_as_of(account_number, as_of):
+
+    rows = run_on_shard(shard_for_account(account_number), fetch_rows, """
+        SELECT transaction_date, balance
+        FROM transactions
+        WHERE account_number = %s AND transaction_date <= %s
+        ORDER BY transaction_date DESC, id DESC
+        LIMIT 1
+        """, (account_number, as_of), "balance.as_of", QUERY_TIMEOUTS_MS["customer"])
+
+    row = rows[0] if rows else None
+
+    return {
+        "account_number": account_number,
+        "as_of": as_of,
+        "balance": row[1] if row else None,
+        "last_transaction_date": row[0] if row else None,
+    }
+
+def fetch_end_of_day_balances(cursor, account_number, start_date, end_date):
+
+    # Balance carried into the range from the last transaction before it
+    carried = None
+    if start_date:
+        cursor.execute("""
+            SELECT balance
+            FROM transactions
+            WHERE account_number = %s AND transaction_date < %s
+            ORDER BY transaction_date DESC, id DESC
+            LIMIT 1
+            """, (account_number, start_date), name="balance.carried", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
+        row = cursor.fetchone()
+        carried = row[0] if row else None
+
+    filters = ["account_number = %s"]
+    params = [account_number]
+    if start_date:
+        filters.append("transaction_date >= %s")
+        params.append(start_date)
+    if end_date:
+        filters.append("transaction_date <= %s")
+        params.append(end_date)
+
+    # Index order, so the last row of each day is that day's closing balance
+    cursor.execute(f"""
+        SELECT transaction_date, balance
+        FROM transactions
+        WHERE {" AND ".join(filters)}
+        ORDER BY transaction_date, id
+        """, params, name="balance.daily", timeout_ms=QUERY_TIMEOUTS_MS["customer"])
+
+    end_of_day = {}
+    for txn_date, balance in cursor.fetchall():
+        end_of_day[txn_date] = balance
+
+    return carried, end_of_day
+
+
+def daily_balances(account_number, start_date=None, end_date=None, max_points=1000):
+
+    carried, end_of_day = run_on_shard(shard_for_account(account_number), fetch_end_of_day_balances,
+                                       account_number, start_date, end_date)
+
+    # Days without transactions keep the previous day's balance
+    points = []
+    if end_of_day or carried is not None:
+        first_day = start_date or min(end_of_day)
+        last_day = end_date or max(end_of_day, default=first_day)
+
+        # Open-ended ranges keep their latest MAX_DAILY_BALANCE_DAYS days
+        if (last_day - first_day).days >= MAX_DAILY_BALANCE_DAYS:
+            first_day = last_day - timedelta(days=MAX_DAILY_BALANCE_DAYS - 1)
+
+        balance = carried
+        for txn_date, txn_balance in end_of_day.items():
+            if txn_date >= first_day:
+                break
+            balance = txn_balance
+
+        # Counted in days rather than stepping a date, which would overflow at date.max
+        for offset in range((last_day - first_day).days + 1):
+            day = first_day + timedelta(days=offset)
+            balance = end_of_day.get(day, balance)
+            if balance is not None:
+                points.append((day.toordinal(), float(balance)))
+
+    downsampled = lttb(points, max_points)
+
+    return {
+        "account_number": account_number,
+        "raw_points": len(points),
+        "downsampled": len(downsampled) < len(points),
+        "points": [(bucket_from_ordinal(x), y) for x, y in downsampled],
+    }
+
+
+# -------------------------------------------------
+# Alert List: every flagged account, for risk teams (precomputed by jobs/alert_engine.py)
+# -------------------------------------------------
+def alert_list(rule=None, limit=1000, offset=0):
+
+    # Each shard returns its first offset + limit alerts in list order; the page is cut after merging
+    per_shard = scatter(fetch_rows, """
+        SELECT al.rule_order, al.account_number, a.holder_name, a.branch, al.rule, al.message, al.computed_at
+        FROM account_alerts al
+        JOIN account_info a
+        ON al.account_number = a.account_number
+        WHERE %(rule)s IS NULL OR al.rule = %(rule)s
+        ORDER BY al.rule_order, al.account_number
+        LIMIT %(limit)s
+        """, {"rule": rule, "limit": limit + offset}, "alerts.list", QUERY_TIMEOUTS_MS["region"])
+
+    rows = sorted(gather(per_shard), key=lambda row: (row[0], row[1]))[offset:offset + limit]
+
+    columns = ["account_number", "holder_name", "branch", "rule", "message", "computed_at"]
+    alerts = [dict(zip(columns, row[1:])) for row in rows]
+
+    return alerts
@@ -1,7 +1,14 @@
 import psycopg2
+import psycopg2.extensions
+import contextvars
 import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from Fastapi.metrics import record_query
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,9 +24,113 @@ db_config = {
     "port": os.getenv("DB_PORT", 5432)
 }
 
+# -------------------------------------------------
+# SHARDING: one libpq DSN per shard, comma-separated. Accounts are placed by a stable
+# hash of the account number; shard 0 is also the main database (branch/city
+# dimensions, processed_files). Unset means a single database configured by DB_*.
+# -------------------------------------------------
+SHARD_DSNS = [dsn.strip() for dsn in os.getenv("SHARD_DSNS", "").split(",") if dsn.strip()]
+
+# Threads used to query shards in parallel
+SHARD_POOL_WORKERS = int(os.getenv("SHARD_POOL_WORKERS", 16))
+
+# NOTIFY channel for ingestion change events (Fastapi/events.py), on the main database
+CHANGE_CHANNEL = "dashboard_changes"
+
+# Queries slower than this are logged with their EXPLAIN plan. The plan is estimated
+# only: ANALYZE runs the slow query a second time inside the request, so it is opt-in
+# (auto_explain captures actual plans without touching the request path)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+EXPLAIN_SLOW_QUERIES = os.getenv("EXPLAIN_SLOW_QUERIES", "true").lower() == "true"
+EXPLAIN_ANALYZE_SLOW_QUERIES = os.getenv("EXPLAIN_ANALYZE_SLOW_QUERIES", "false").lower() == "true"
+
+# -------------------------------------------------
+# TRACED CURSOR: per-query timings and row counts
+# -------------------------------------------------
+
+class TracedCursor(psycopg2.extensions.cursor):
+
+    statement_timeout_ms = None
+
+    def execute(self, query, vars=None, name=None, timeout_ms=None):
+        # Per-query statement_timeout budget, only re-issued when it changes
+        if timeout_ms is not None and timeout_ms != self.statement_timeout_ms:
+            super().execute("SET statement_timeout = %s", (int(timeout_ms),))
+            self.statement_timeout_ms = timeout_ms
+
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            record_query(name or "unnamed", elapsed_ms, self.rowcount)
+
+            if elapsed_ms > SLOW_QUERY_MS:
+                self._log_slow_query(name, query, vars, elapsed_ms)
+
+    def _log_slow_query(self, name, query, vars, elapsed_ms):
+        sql = self.mogrify(query, vars).decode()
+        print(f"Slow query [{name or 'unnamed'}] {elapsed_ms:.1f} ms, {self.rowcount} rows:\n{sql.strip()}")
+
+        if not EXPLAIN_SLOW_QUERIES or not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        if self.connection.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+            return
+
+        # Separate plain cursor: this cursor's buffered results stay untouched
+        explain = psycopg2.extensions.cursor(self.connection)
+        try:
+            explain.execute(("EXPLAIN (ANALYZE, BUFFERS) " if EXPLAIN_ANALYZE_SLOW_QUERIES else "EXPLAIN ") + sql)
+            plan = "\n".join(row[0] for row in explain.fetchall())
+            print(f"Plan [{name or 'unnamed'}]:\n{plan}")
+        except psycopg2.Error as e:
+            print(f"Could not explain slow query [{name or 'unnamed'}]: {e}")
+        finally:
+            explain.close()
+
 # -------------------------------------------------
 # DATABASE CONNECTION
 # -------------------------------------------------
 
-def db_connection():
-    return psycopg2.connect(**db_config)
\ No newline at end of file
+def db_connection(shard=0):
+    if SHARD_DSNS:
+        return psycopg2.connect(SHARD_DSNS[shard], cursor_factory=TracedCursor)
+    return psycopg2.connect(**db_config, cursor_factory=TracedCursor)
+
+
+def shard_count():
+    return max(1, len(SHARD_DSNS))
+
+
+def shard_for_account(account_number):
+    # crc32 rather than hash(): placement must not change between processes
+    return zlib.crc32(str(account_number).encode()) % shard_count()
+
+# -------------------------------------------------
+# SCATTER-GATHER: run fn(cursor, *args) on every shard in parallel and return the
+# per-shard results in shard order, for the caller to merge
+# -------------------------------------------------
+
+_shard_pool = ThreadPoolExecutor(max_workers=SHARD_POOL_WORKERS, thread_name_prefix="shard")
+
+
+def run_on_shard(shard, fn, *args):
+    conn = db_connection(shard)
+    cursor = conn.cursor()
+    try:
+        return fn(cursor, *args)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def scatter(fn, *args):
+    if shard_count() == 1:
+        return [run_on_shard(0, fn, *args)]
+
+    # A context copy per task keeps shard queries in the calling request's trace
+    futures = [
+        _shard_pool.submit(contextvars.copy_context().run, run_on_shard, shard, fn, *args)
+        for shard in range(shard_count())
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import select
+import threading
+import time
+
+from Fastapi.db import db_connection, CHANGE_CHANNEL
+
+# -------------------------------------------------
+# CHANGE EVENTS: Postgres LISTEN/NOTIFY fanned out to Server-Sent Events clients
+#
+# run_extraction sends one NOTIFY per statement (account, branch, city, months)
+# on the main database; they are delivered when its transaction commits, after
+# the statement rows themselves are committed on every shard. One listener
+# thread per API process forwards them to every connected /events stream.
+# -------------------------------------------------
+
+# Comment line sent on idle streams so proxies keep them open and dead clients are noticed
+SSE_KEEPALIVE_S = float(os.getenv("SSE_KEEPALIVE_S", 15))
+
+# Streams per API process; further clients get a 503 and retry
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", 200))
+
+# Events buffered per client before it is told to resync
+SSE_CLIENT_QUEUE = 256
+
+# Sent to every client after the listener reconnects (or a client falls behind):
+# events may have been missed, so everything should be re-fetched
+RESYNC_EVENT = {"type": "resync"}
+
+
+class ChangeBroker:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._thread = None
+        self.published = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def subscribe(self):
+        # Called from the event loop; the listener only starts with the first client
+        with self._lock:
+            if len(self._clients) >= SSE_MAX_CLIENTS:
+                return None
+            queue = asyncio.Queue(maxsize=SSE_CLIENT_QUEUE)
+            self._clients.add((asyncio.get_running_loop(), queue))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="change-listener", daemon=True)
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._clients = {client for client in self._clients if client[1] is not queue}
+
+    def publish(self, event):
+        with self._lock:
+            clients = list(self._clients)
+        self.published += 1
+        for loop, queue in clients:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    def _offer(self, queue, event):
+        if queue.full():
+            # Slow client: replace its backlog with a single resync
+            self.dropped += 1
+            while not queue.empty():
+                queue.get_nowait()
+            event = RESYNC_EVENT
+        queue.put_nowait(event)
+
+    def _listen(self):
+        backoff = 1
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = db_connection()
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CHANGE_CHANNEL}", name="events.listen")
+                print(f"Listening for change events on {CHANGE_CHANNEL}")
+                if connected_before:
+                    self.reconnects += 1
+                    self.publish(RESYNC_EVENT)
+                connected_before = True
+                backoff = 1
+
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notify.payload))
+                        except ValueError:
+                            print(f"Ignoring malformed change event: {notify.payload[:200]}")
+
+            except Exception as e:
+                print(f"Change listener error: {e}, reconnecting in {backoff}s")
+                if conn is not None:
+                    conn.close()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def stats(self):
+        with self._lock:
+            clients = len(self._clients)
+        return {
+            "clients": clients,
+            "max_clients": SSE_MAX_CLIENTS,
+            "published": self.published,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+broker = ChangeBroker()
+
+# -------------------------------------------------
+# SSE STREAM (filtered by branch and/or city; no filter means every event)
+# -------------------------------------------------
+
+def event_matches(event, branches, cities):
+    if event.get("type") == "resync" or not (branches or cities):
+        return True
+    return event.get("branch") in (branches or ()) or event.get("city") in (cities or ())
+
+
+def format_event(event):
+    return f"event: {event.get('type', 'change')}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(request, queue, branches=None, cities=None):
+    try:
+        # Clients reconnect after 3s if the stream drops
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+
+            if event_matches(event, branches, cities):
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(queue)
@@ -1,12 +1,99 @@
-from fastapi import FastAPI
-from Fastapi.dashboard import customer_dashboard, branch_dashboard, region_dashboard, branch, city
+import os
+import time
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from psycopg2.errors import QueryCanceled
+from Fastapi.dashboard import customer_dashboard, branch_dashboard, region_dashboard, branch, city, transaction_timeseries, alert_list, balance_as_of, daily_balances, MAX_DAILY_BALANCE_DAYS, bucket_count, MAX_TIMESERIES_BUCKETS
+from Fastapi.metrics import registry, start_request_trace, end_request_trace
+from Fastapi.admission import AdmissionRejected, LIMITERS, limiter_for_path
+from Fastapi.events import broker, event_stream
 
 app = FastAPI()
 
+# Requests slower than this are logged with their per-query breakdown
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+
+# -------------------------------------------------
+# ADMISSION CONTROL MIDDLEWARE
+# -------------------------------------------------
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    limiter = limiter_for_path(request.url.path)
+    if limiter is None:
+        return await call_next(request)
+
+    try:
+        await limiter.acquire()
+    except AdmissionRejected as e:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Server busy ({e.name}), please retry."},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    try:
+        return await call_next(request)
+    finally:
+        limiter.release()
+
+# A query that exceeded its statement_timeout budget is reported as overload, not a crash
+@app.exception_handler(QueryCanceled)
+async def query_timeout_handler(request: Request, exc: QueryCanceled):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Query exceeded its time budget, please retry."},
+        headers={"Retry-After": "5"},
+    )
+
+# -------------------------------------------------
+# REQUEST TRACING MIDDLEWARE
+# -------------------------------------------------
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace, token = start_request_trace()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        end_request_trace(token)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    # Group by route template (/branch/{branch_name}), not by raw URL; requests that never
+    # reached a route (404s, admission rejections) are grouped by status code
+    route = request.scope.get("route")
+    route_name = f"{request.method} {route.path if route else f'unrouted {response.status_code}'}"
+    registry.observe_route(route_name, elapsed_ms)
+
+    db_ms = sum(q["ms"] for q in trace)
+    response.headers["X-Response-Time-Ms"] = f"{elapsed_ms:.2f}"
+    response.headers["X-DB-Queries"] = str(len(trace))
+    response.headers["X-DB-Time-Ms"] = f"{db_ms:.2f}"
+
+    if elapsed_ms > SLOW_REQUEST_MS:
+        print(f"Slow request {route_name} ({request.url.path}) {elapsed_ms:.1f} ms, "
+              f"{len(trace)} queries, {db_ms:.1f} ms in DB")
+        for q in trace:
+            print(f"    {q['query']:<32} {q['ms']:>9.2f} ms {q['rows']:>8} rows")
+
+    return response
+
 @app.get("/")
 def root():
     return {"message": "API running"}
 
+# -------------------------------------------------
+# METRICS ENDPOINT
+# -------------------------------------------------
+@app.get("/metrics")
+def get_metrics():
+    metrics = registry.snapshot()
+    metrics["admission"] = {name: limiter.stats() for name, limiter in LIMITERS.items()}
+    metrics["events"] = broker.stats()
+    return metrics
+
 # -------------------------------------------------
 # CUSTOMER DASHBOARD ENDPOINT
 # -------------------------------------------------
@@ -38,3 +125,61 @@ def get_all_cities():
 @app.get("/region/{city}")
 def get_region_dashboard(city):
     return region_dashboard(city)
+
+
+# -------------------------------------------------
+# TIME SERIES ENDPOINT
+# -------------------------------------------------
+@app.get("/timeseries/{scope}/{key}")
+def get_timeseries(scope: Literal["account", "branch", "city"], key: str,
+                   metric: Literal["transactions", "deposits", "withdrawals"] = "deposits",
+                   granularity: Literal["day", "week", "month"] = "month",
+                   max_points: int = Query(500, ge=3, le=5000),
+                   start: Optional[date] = None, end: Optional[date] = None):
+    if start and end and bucket_count(start, end, granularity) > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=422, detail=f"Date range is longer than {MAX_TIMESERIES_BUCKETS} {granularity}s")
+    return transaction_timeseries(scope, key, metric, granularity, max_points, start, end)
+
+
+# -------------------------------------------------
+# BALANCE ENDPOINTS
+# -------------------------------------------------
+@app.get("/balance/{account_number}")
+def get_balance(account_number: str, as_of: Optional[date] = None):
+    return balance_as_of(account_number, as_of or date.today())
+
+
+@app.get("/balance/{account_number}/daily")
+def get_daily_balances(account_number: str, start: Optional[date] = None, end: Optional[date] = None,
+                       max_points: int = Query(1000, ge=3, le=5000)):
+    if start and end and (end - start).days >= MAX_DAILY_BALANCE_DAYS:
+        raise HTTPException(status_code=422, detail=f"Date range is longer than {MAX_DAILY_BALANCE_DAYS} days")
+    return daily_balances(account_number, start, end, max_points)
+
+
+# -------------------------------------------------
+# ALERTS ENDPOINT
+# -------------------------------------------------
+@app.get("/alerts")
+def get_alerts(rule: Optional[str] = None, limit: int = Query(1000, ge=1, le=10000), offset: int = Query(0, ge=0)):
+    return alert_list(rule, limit, offset)
+
+
+# -------------------------------------------------
+# CHANGE EVENTS ENDPOINT (Server-Sent Events)
+# -------------------------------------------------
+@app.get("/events")
+async def get_events(request: Request, branch: Optional[List[str]] = Query(None),
+                     city: Optional[List[str]] = Query(None)):
+    queue = broker.subscribe()
+    if queue is None:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Too many event streams, please retry."},
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        event_stream(request, queue, branch, city),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,98 @@
+import threading
+from contextvars import ContextVar
+
+# -------------------------------------------------
+# LATENCY HISTOGRAMS (per route and per query name)
+# -------------------------------------------------
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bucket_counts = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, elapsed_ms, rows=0):
+        self.count += 1
+        self.sum_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(rows, 0)
+
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def to_dict(self):
+        # Cumulative buckets, Prometheus "le" style
+        cumulative = {}
+        running = 0
+        for bound, count in zip(BUCKETS_MS, self.bucket_counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = self.count
+
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 2),
+            "avg_ms": round(self.sum_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "rows": self.rows,
+            "buckets_ms": cumulative,
+        }
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+        self.queries = {}
+
+    def observe_route(self, route, elapsed_ms):
+        with self._lock:
+            self.routes.setdefault(route, Histogram()).observe(elapsed_ms)
+
+    def observe_query(self, name, elapsed_ms, rows):
+        with self._lock:
+            self.queries.setdefault(name, Histogram()).observe(elapsed_ms, rows)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "routes": {k: v.to_dict() for k, v in sorted(self.routes.items())},
+                "queries": {k: v.to_dict() for k, v in sorted(self.queries.items())},
+            }
+
+
+registry = MetricsRegistry()
+
+# -------------------------------------------------
+# PER-REQUEST QUERY TRACE
+# -------------------------------------------------
+
+_request_trace = ContextVar("request_trace", default=None)
+
+
+def start_request_trace():
+    trace = []
+    token = _request_trace.set(trace)
+    return trace, token
+
+
+def end_request_trace(token):
+    _request_trace.reset(token)
+
+
+def record_query(name, elapsed_ms, rows):
+    registry.observe_query(name, elapsed_ms, rows)
+
+    trace = _request_trace.get()
+    if trace is not None:
+        trace.append({"query": name, "ms": round(elapsed_ms, 2), "rows": rows})
@@ -0,0 +1,158 @@
+import hashlib
+import math
+
+import numpy as np
+
+# -------------------------------------------------
+# MERGEABLE SKETCHES (stored per branch per month in branch_month_sketches)
+#
+#   HyperLogLog  distinct accounts, ~1.6% standard error at HLL_PRECISION 12
+#   TDigest      balance quantiles, most accurate towards the tails
+#
+# Both merge losslessly with sketches of the same kind, so branch sketches roll
+# up to city and bank level without touching the transactions table.
+# -------------------------------------------------
+
+HLL_PRECISION = 12
+TDIGEST_COMPRESSION = 100
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+
+    def __init__(self, registers=None):
+        m = 1 << HLL_PRECISION
+        if registers is None:
+            self.registers = np.zeros(m, dtype=np.uint8)
+        else:
+            self.registers = np.frombuffer(bytes(registers), dtype=np.uint8).copy()
+
+    def add(self, value):
+        self.update([value])
+
+    def update(self, values):
+        hashes = np.fromiter((_hash64(v) for v in values), dtype=np.uint64)
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - HLL_PRECISION)) - 1)
+        # Position of the first set bit in the remaining hash bits (exact: rest < 2**52)
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest > 0
+        bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank = ((64 - HLL_PRECISION) - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+
+class TDigest:
+
+    def __init__(self, centroids=None):
+        # Sorted [mean, weight] pairs
+        self.centroids = [list(c) for c in centroids] if centroids else []
+
+    def _k(self, q):
+        return TDIGEST_COMPRESSION / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self, points):
+        points.sort()
+        total = sum(weight for _, weight in points)
+        merged = []
+        mean, weight = points[0]
+        seen = 0.0
+        k_low = self._k(0)
+
+        for next_mean, next_weight in points[1:]:
+            if self._k(min(1.0, (seen + weight + next_weight) / total)) - k_low <= 1:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append([mean, weight])
+                seen += weight
+                k_low = self._k(seen / total)
+                mean, weight = next_mean, next_weight
+
+        merged.append([mean, weight])
+        self.centroids = merged
+
+    def update(self, values):
+        points = self.centroids + [[float(v), 1.0] for v in values]
+        if points:
+            self._compress(points)
+
+    def merge(self, other):
+        if other.centroids:
+            self._compress(self.centroids + [list(c) for c in other.centroids])
+        return self
+
+    def count(self):
+        return int(sum(weight for _, weight in self.centroids))
+
+    def quantile(self, q):
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        total = sum(weight for _, weight in self.centroids)
+        target = q * total
+        seen = 0.0
+        # Interpolate between the midpoints of neighbouring centroids
+        for (mean, weight), (next_mean, next_weight) in zip(self.centroids, self.centroids[1:]):
+            mid = seen + weight / 2
+            next_mid = seen + weight + next_weight / 2
+            if target <= mid:
+                return mean
+            if target <= next_mid:
+                return mean + (next_mean - mean) * (target - mid) / (next_mid - mid)
+            seen += weight
+        return self.centroids[-1][0]
+
+    def to_json(self):
+        return [[round(mean, 2), weight] for mean, weight in self.centroids]
+
+
+# -------------------------------------------------
+# ROLL-UP: merge (customers_hll, balance_digest) rows into one pair
+# -------------------------------------------------
+
+def merge_sketches(rows):
+    customers = HyperLogLog()
+    points = []
+    for hll_bytes, digest in rows:
+        customers.merge(HyperLogLog(hll_bytes))
+        points.extend([list(c) for c in digest])
+
+    # One compression pass over every centroid instead of one per merged digest
+    balances = TDigest()
+    if points:
+        balances._compress(points)
+    return customers, balances
+
+
+def sketch_summary(rows):
+    customers, balances = merge_sketches(rows)
+    return {
+        "active_customers": customers.count(),
+        "median_balance": balances.quantile(0.5),
+        "p90_balance": balances.quantile(0.9),
+    }
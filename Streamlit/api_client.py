@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# -------------------------------------------------
+# API CLIENT CONFIGURATION
+# -------------------------------------------------
+
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+
+REQUEST_TIMEOUT_S = float(os.getenv("API_TIMEOUT_S", 30))
+
+# Dashboard payloads are refreshed after a minute, dropdown lists after an hour
+DASHBOARD_TTL_S = int(os.getenv("DASHBOARD_CACHE_TTL_S", 60))
+DROPDOWN_TTL_S = int(os.getenv("DROPDOWN_CACHE_TTL_S", 3600))
+
+# How often an open dashboard checks the change stream (a local check, no API call)
+LIVE_CHECK_S = float(os.getenv("LIVE_CHECK_S", 2))
+
+# The API sends a keepalive every 15s; a silent stream is reconnected after this
+EVENTS_READ_TIMEOUT_S = float(os.getenv("EVENTS_READ_TIMEOUT_S", 60))
+
+
+class ApiError(Exception):
+
+    def __init__(self, status_code, path):
+        super().__init__(f"API returned {status_code} for {path}")
+        self.status_code = status_code
+        self.path = path
+
+# -------------------------------------------------
+# POOLED KEEP-ALIVE SESSION (one per Streamlit server process)
+# -------------------------------------------------
+
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_json(path, params=None):
+    response = get_session().get(f"{API_URL}{path}", params=params, timeout=REQUEST_TIMEOUT_S)
+    if response.status_code != 200:
+        # Raising keeps failed responses out of the cache
+        raise ApiError(response.status_code, path)
+    return response.json()
+
+# -------------------------------------------------
+# TTL-CACHED FETCHES (shared across all sessions)
+# Branch, region and trend fetches take the live version of their branch or city:
+# it only keys the cache, so a change reported by the API gets a fresh entry
+# -------------------------------------------------
+
+@st.cache_data(ttl=DROPDOWN_TTL_S, show_spinner=False)
+def load_branches():
+    return get_json("/branches")
+
+
+@st.cache_data(ttl=DROPDOWN_TTL_S, show_spinner=False)
+def load_cities():
+    return get_json("/cities")
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_customer(account_number):
+    return get_json(f"/customer/{quote(account_number, safe='')}")
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_branch(branch_name, version=None):
+    return get_json(f"/branch/{quote(branch_name, safe='')}")
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_region(city_name, version=None):
+    return get_json(f"/region/{quote(city_name, safe='')}")
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_timeseries(scope, key, metric, granularity, max_points, start_date, end_date, version=None):
+    params = {
+        "metric": metric, "granularity": granularity, "max_points": max_points,
+        "start": start_date.isoformat(), "end": end_date.isoformat(),
+    }
+    return get_json(f"/timeseries/{scope}/{quote(key, safe='')}", params=params)
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_daily_balances(account_number, max_points):
+    return get_json(f"/balance/{quote(account_number, safe='')}/daily", params={"max_points": max_points})
+
+
+def choose_granularity(start_date, end_date, max_points):
+    # Finest resolution whose bucket count stays within twice the points budget;
+    # LTTB on the server trims the rest
+    span_days = (end_date - start_date).days + 1
+    if span_days <= max_points * 2:
+        return "day"
+    if span_days / 7 <= max_points * 2:
+        return "week"
+    return "month"
+
+# -------------------------------------------------
+# LIVE UPDATES: one /events stream per Streamlit server process, turned into a
+# version per branch and city that dashboards compare against what they loaded
+# -------------------------------------------------
+
+class ChangeWatcher:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Bumped on every (re)connect and resync, when events may have been missed
+        self.epoch = 0
+        self.versions = {}
+        threading.Thread(target=self._run, name="change-watcher", daemon=True).start()
+
+    def version(self, scope, key):
+        with self._lock:
+            return (self.epoch, self.versions.get((scope, key), 0))
+
+    def apply(self, event):
+        with self._lock:
+            if event.get("type") == "resync":
+                self.epoch += 1
+                return
+            for scope in ("branch", "city"):
+                if event.get(scope):
+                    self.versions[(scope, event[scope])] = self.versions.get((scope, event[scope]), 0) + 1
+
+    def _run(self):
+        backoff = 1
+        while True:
+            try:
+                with requests.get(f"{API_URL}/events", stream=True,
+                                  timeout=(REQUEST_TIMEOUT_S, EVENTS_READ_TIMEOUT_S)) as response:
+                    if response.status_code != 200:
+                        raise ApiError(response.status_code, "/events")
+                    self.apply({"type": "resync"})
+                    backoff = 1
+
+                    data = []
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line.startswith("data:"):
+                            data.append(line[5:].strip())
+                        elif not line and data:
+                            self.apply(json.loads("\n".join(data)))
+                            data = []
+            except (ApiError, requests.RequestException, ValueError):
+                pass
+
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+@st.cache_resource
+def get_change_watcher():
+    return ChangeWatcher()
+
+
+def live_version(scope, key):
+    return get_change_watcher().version(scope, key)
+
+# -------------------------------------------------
+# BACKGROUND PREFETCH OF THE LIKELY NEXT VIEW
+# -------------------------------------------------
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+_inflight = set()
+_inflight_lock = threading.Lock()
+
+
+def prefetch(fetch, *args):
+    # Warms the shared cache; a later call with the same args returns instantly
+    key = (fetch.__name__, args)
+    with _inflight_lock:
+        if key in _inflight:
+            return
+        _inflight.add(key)
+
+    # The cached fetches look for the session's script context; pool threads have none
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            fetch(*args)
+        except (ApiError, requests.RequestException):
+            pass
+        finally:
+            with _inflight_lock:
+                _inflight.discard(key)
+
+    _prefetch_pool.submit(run)
+
+
+def prefetch_on_change(slot, selection):
+    # True once per new selection of a widget, so reruns on the same selection do not prefetch again
+    if st.session_state.get(slot) == selection:
+        return False
+    st.session_state[slot] = selection
+    return True
+
+
+def branches_in_city(city_name, branch_list):
+    return [b for b in branch_list if b.split(" - ")[0] == city_name]
@@ -1,8 +1,8 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
-import requests
-import pandas as pd
-import plotly.express as px
+from api_client import (ApiError, load_branches, load_cities, fetch_customer, fetch_branch,
+                        fetch_region, fetch_timeseries, fetch_daily_balances, choose_granularity,
+                        prefetch, prefetch_on_change, branches_in_city, live_version, LIVE_CHECK_S)
 
 st.set_page_config(page_title="Axis Bank Analytics", layout="wide")
 
@@ -102,7 +102,16 @@ st.markdown("""
 
 st.title("🏦 Axis Bank Transaction Analytics Dashboard")
 
-API_URL = "http://127.0.0.1:8000"
+# Upper bound on points per trend chart; keeps payloads and Plotly render time bounded
+TREND_MAX_POINTS = 400
+
+
+# Reruns the page once the API reports new statements for the open branch or city;
+# between changes the check stays local and nothing is re-fetched
+@st.fragment(run_every=LIVE_CHECK_S)
+def watch_changes(scope, key, loaded_version):
+    if live_version(scope, key) != loaded_version:
+        st.rerun()
 
 with st.sidebar:
     role = option_menu(
@@ -137,14 +146,13 @@ if role == "Customer":
         
             if st.button("Login"):
                 if account_number:
-                    response = requests.get(f"{API_URL}/customer/{account_number}")
-
-                    if response.status_code == 200:
+                    try:
+                        st.session_state.customer_data = fetch_customer(account_number)
+                        st.session_state.account_number = account_number
                         st.session_state.customer_logged_in = True
-                        st.session_state.customer_data = response.json()
                         st.success("Login successful!")
                         st.rerun()
-                    else:
+                    except ApiError:
                         st.error("Account not found. Please check your account number.")
                 else:
                     st.warning("Please enter an account number.")
@@ -163,6 +171,7 @@ if role == "Customer":
             if st.button("Logout"):
                 st.session_state.customer_logged_in = False
                 st.session_state.customer_data = None
+                st.session_state.account_number = None
                 st.session_state.selected_month = []
                 st.success("Logged out successfully!")
                 st.rerun()
@@ -194,7 +203,10 @@ if role == "Customer":
             for alert in data['alerts']:
                 st.warning(alert)
 
-        # Visualizations..
+        # Visualizations (pandas and Plotly load with the first dashboard, not the login page)..
+        import pandas as pd
+        import plotly.express as px
+
         st.subheader("Spending Analysis")
 
         monthly_df = pd.DataFrame(data['monthly_spend'], columns=['Month', 'Total Outgoings', 'Total Incomings'])
@@ -227,6 +239,19 @@ if role == "Customer":
         
         st.plotly_chart(fig, width=1000, height= 500)
 
+        # Daily balance curve from the stored running balances
+        try:
+            balances = fetch_daily_balances(st.session_state.account_number, TREND_MAX_POINTS)
+            balance_df = pd.DataFrame(balances['points'], columns=['Date', 'Balance'])
+
+            fig = px.line(balance_df, x='Date', y='Balance', title="Daily Balance")
+            fig.update_layout(yaxis_title="Balance (₹)", template="plotly_white",
+                              title_font=dict(size=20, color = "#97144D", family="Arial"))
+
+            st.plotly_chart(fig, width=1000, height=400)
+        except ApiError:
+            st.error("Failed to load daily balance.")
+
         # Pie chart for category-wise spending
         cat_df = pd.DataFrame(data['category_details'], columns=['Category', 'Total Spend'])
 
@@ -238,6 +263,16 @@ if role == "Customer":
         
         st.plotly_chart(fig, width= 1000, height= 800)
 
+        # Recurring payments (rent, SIPs, subscriptions, EMIs)..
+        if data.get('recurring_payments'):
+            st.subheader("Recurring Payments")
+
+            recurring_df = pd.DataFrame(data['recurring_payments'])
+            recurring_df.columns = ['Merchant', 'Category', 'Frequency', 'Average Amount (₹)',
+                                    'Last Paid', 'Next Expected']
+
+            st.dataframe(recurring_df, hide_index=True)
+
 # -------------------------------------------------
 # Branch Manager Dashboard.
 # -------------------------------------------------
@@ -250,38 +285,51 @@ elif role == "Branch Manager":
 
     if "selected_branch" not in st.session_state:
         st.session_state.selected_branch = None
+
+    if "branch_version" not in st.session_state:
+        st.session_state.branch_version = None
     
     # Sidebar for branch selection
     with st.sidebar:
 
-        @st.cache_data
-        def load_branches():
-            response = requests.get(f"{API_URL}/branches")
-            if response.status_code == 200:
-                return response.json()
-            else:
-                st.error("Failed to load branches.")
-                return []
-        
-        branch_list = load_branches()
+        try:
+            branch_list = load_branches()
+        except ApiError:
+            st.error("Failed to load branches.")
+            branch_list = []
 
         branch_name = st.selectbox("Select Branch:", options = branch_list)
+
+        # Warm the cache while the manager reaches for "GET DATA"
+        if branch_name and prefetch_on_change("prefetched_branch", branch_name):
+            prefetch(fetch_branch, branch_name, live_version("branch", branch_name))
     
         if st.button("GET DATA"):
-            response = requests.get(f"{API_URL}/branch/{branch_name}")
-
-            if response.status_code == 200:
-                st.session_state.branch_data = response.json()
+            try:
+                version = live_version("branch", branch_name)
+                st.session_state.branch_data = fetch_branch(branch_name, version)
                 st.session_state.selected_branch = branch_name
+                st.session_state.branch_version = version
                 st.rerun()
-            else:
+            except ApiError:
                 st.error("Branch not found. Please check the branch name.")
 
     # Dashboard View
     if st.session_state.branch_data:
-        data = st.session_state.branch_data
         branch_name = st.session_state.selected_branch
 
+        # New statements for this branch since it was loaded: fetch it again
+        version = live_version("branch", branch_name)
+        if version != st.session_state.branch_version:
+            try:
+                st.session_state.branch_data = fetch_branch(branch_name, version)
+                st.session_state.branch_version = version
+            except ApiError:
+                st.warning("Could not refresh the branch data, showing the last loaded figures.")
+
+        data = st.session_state.branch_data
+        watch_changes("branch", branch_name, st.session_state.branch_version)
+
         st.header(f"{branch_name} - Branch Dashboard")
 
         # Logout button
@@ -289,9 +337,13 @@ elif role == "Branch Manager":
             if st.button("Logout"):
                 st.session_state.branch_data = None
                 st.session_state.selected_branch = None
+                st.session_state.branch_version = None
                 st.rerun()
 
         # Dashboard view...
+        import pandas as pd
+        import plotly.express as px
+
         col1, col2, col3 = st.columns(3)
 
         col1.metric("Total Customers", data['total_customers'])
@@ -314,6 +366,53 @@ elif role == "Branch Manager":
         
         st.plotly_chart(fig, width=1000, height=500)
 
+        # Active customers and balance percentiles per month (sketch estimates)...
+        df_customers = pd.DataFrame(data.get('monthly_customer_stats', []),
+                                    columns=['Month', 'Active Customers', 'Median Balance', 'P90 Balance'])
+
+        if not df_customers.empty:
+            fig = px.line(df_customers, x='Month', y='Active Customers', title="Active Customers per Month")
+            fig.update_layout(template="plotly_white",
+                              title_font=dict(size=20, color = "#97144D", family="Arial"))
+            st.plotly_chart(fig, width=1000, height=400)
+
+            fig = px.line(df_customers, x='Month', y=['Median Balance', 'P90 Balance'],
+                          title="Month-end Balance Percentiles")
+            fig.update_layout(template="plotly_white",
+                              title_font=dict(size=20, color = "#97144D", family="Arial"))
+            st.plotly_chart(fig, width=1000, height=400)
+
+        # Deposit and activity trend, resolution picked from the visible range...
+        if not df_growth.empty:
+            first_day = pd.to_datetime(df_growth['Month']).min().date()
+            last_day = (pd.to_datetime(df_growth['Month']).max() + pd.offsets.MonthEnd(0)).date()
+
+            date_range = st.date_input("Trend Range:", value=(first_day, last_day),
+                                       min_value=first_day, max_value=last_day)
+
+            if len(date_range) == 2:
+                start_date, end_date = date_range
+                granularity = choose_granularity(start_date, end_date, TREND_MAX_POINTS)
+
+                for metric, title in [("deposits", "Deposits"), ("transactions", "Transaction Velocity")]:
+                    try:
+                        series = fetch_timeseries("branch", branch_name, metric, granularity,
+                                                  TREND_MAX_POINTS, start_date, end_date,
+                                                  st.session_state.branch_version)
+                    except ApiError:
+                        st.error(f"Failed to load {title.lower()} trend.")
+                        continue
+
+                    df_trend = pd.DataFrame(series['points'], columns=['Date', title])
+
+                    fig = px.line(df_trend, x='Date', y=title,
+                                  title=f"{title} per {granularity.title()}")
+
+                    fig.update_layout(template="plotly_white",
+                                      title_font=dict(size=20, color = "#97144D", family="Arial"))
+
+                    st.plotly_chart(fig, width=1000, height=400)
+
 # -------------------------------------------------
 #  Region Manager Dashboard.
 # -------------------------------------------------
@@ -326,42 +425,62 @@ elif role == "Region Manager":
     
     if "selected_city" not in st.session_state:
         st.session_state.selected_city = None
+
+    if "city_version" not in st.session_state:
+        st.session_state.city_version = None
     
     # Sidebar for city selection
     with st.sidebar:
 
-        @st.cache_data
-        def load_cities():
-            response = requests.get(f"{API_URL}/cities")
-            if response.status_code == 200:
-                return response.json()
-            else:
-                st.error("Failed to load cities.")
-                return []
-        
-        city_list = load_cities()
+        try:
+            city_list = load_cities()
+        except ApiError:
+            st.error("Failed to load cities.")
+            city_list = []
         
         city_name = st.selectbox("*Enter City Name:*", options = city_list)
+
+        # Warm the region view and the branch views a region manager drills into next
+        if city_name and prefetch_on_change("prefetched_city", city_name):
+            prefetch(fetch_region, city_name, live_version("city", city_name))
+            try:
+                for city_branch in branches_in_city(city_name, load_branches()):
+                    prefetch(fetch_branch, city_branch, live_version("branch", city_branch))
+            except ApiError:
+                pass
     
         if st.button("GET DATA"):
-            response = requests.get(f"{API_URL}/region/{city_name}")
-            if response.status_code == 200:
-                st.session_state.region_data = response.json()
+            try:
+                version = live_version("city", city_name)
+                st.session_state.region_data = fetch_region(city_name, version)
                 st.session_state.selected_city = city_name
+                st.session_state.city_version = version
                 st.rerun()
-            else:
+            except ApiError:
                 st.error("City not found. Please check the city name.")
 
     # Dashboard View
     if st.session_state.region_data:
-        data = st.session_state.region_data
         city_name = st.session_state.selected_city
 
+        # New statements for this city since it was loaded: fetch it again
+        version = live_version("city", city_name)
+        if version != st.session_state.city_version:
+            try:
+                st.session_state.region_data = fetch_region(city_name, version)
+                st.session_state.city_version = version
+            except ApiError:
+                st.warning("Could not refresh the region data, showing the last loaded figures.")
+
+        data = st.session_state.region_data
+        watch_changes("city", city_name, st.session_state.city_version)
+
         # Logout button
         with st.sidebar:
             if st.button("Logout"):
                 st.session_state.region_data = None
                 st.session_state.selected_city = None
+                st.session_state.city_version = None
                 st.rerun()
     
         st.header(f"{city_name} - Region Dashboard")
@@ -369,6 +488,8 @@ elif role == "Region Manager":
         st.subheader(f"Total Branches: {data['branch_count']}")
 
         # Branch comparison Chart...
+        import pandas as pd
+        import plotly.express as px
 
         df_branch = pd.DataFrame(data["branch_comparison"], columns=["Branch", "Total Deposits"])
 
@@ -387,3 +508,28 @@ elif role == "Region Manager":
                     showlegend = False)
 
         st.plotly_chart(fig, width=1000, height=500)
+
+        # City activity against the whole bank (merged branch sketches)...
+        stat_columns = ['Month', 'Active Customers', 'Median Balance', 'P90 Balance']
+        df_city = pd.DataFrame(data.get('monthly_customer_stats', []), columns=stat_columns)
+        df_bank = pd.DataFrame(data.get('bank_customer_stats', []), columns=stat_columns)
+
+        if not df_city.empty and not df_bank.empty:
+            latest_bank = df_bank.iloc[-1]
+            city_month = df_city[df_city['Month'] == latest_bank['Month']]
+            latest_city = city_month.iloc[-1] if not city_month.empty else df_city.iloc[-1]
+
+            st.subheader(f"Customers for {latest_bank['Month']}")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Active Customers", int(latest_city['Active Customers']),
+                        f"of {int(latest_bank['Active Customers'])} bank-wide", delta_color="off")
+            # A month whose statements all end before its last day has no month-end balances yet
+            for col, label in ((col2, "Median Balance"), (col3, "P90 Balance")):
+                if pd.notna(latest_city[label]) and pd.notna(latest_bank[label]):
+                    col.metric(label, f"₹{round(latest_city[label], 2)}",
+                               f"bank ₹{round(latest_bank[label], 2)}", delta_color="off")
+
+            fig = px.line(df_city, x='Month', y='Active Customers', title=f"Active Customers per Month in {city_name}")
+            fig.update_layout(template="plotly_white",
+                              title_font=dict(size=20, color = "#97144D", family="Arial"))
+            st.plotly_chart(fig, width=1000, height=400)
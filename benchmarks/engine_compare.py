@@ -0,0 +1,115 @@
+import argparse
+import importlib
+import math
+import os
+import time
+
+# -------------------------------------------------
+# POSTGRES vs COLUMNAR ENGINE COMPARISON
+# Runs branch_dashboard / region_dashboard in-process against both engines,
+# checks that they agree and reports latency per engine.
+# -------------------------------------------------
+
+
+def load_dashboard(engine):
+    os.environ["ANALYTICS_ENGINE"] = engine
+    import Fastapi.dashboard as dashboard
+    return importlib.reload(dashboard)
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def time_calls(fn, keys, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for key in keys:
+            start = time.perf_counter()
+            fn(key)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def close(a, b, rel=1e-6):
+    if a is None or b is None:
+        return a == b
+    return math.isclose(float(a), float(b), rel_tol=rel, abs_tol=0.01)
+
+
+def compare_results(name, pg, col):
+    mismatches = []
+    for field, pg_value in pg.items():
+        col_value = col[field]
+        if isinstance(pg_value, list):
+            pg_rows = sorted((str(r[0])[:10], r[1]) for r in pg_value)
+            col_rows = sorted((str(r[0])[:10], r[1]) for r in col_value)
+            same = len(pg_rows) == len(col_rows) and all(
+                p[0] == c[0] and close(p[1], c[1]) for p, c in zip(pg_rows, col_rows))
+        elif field == "total_customers":
+            # Postgres side is a HyperLogLog estimate when branch sketches exist
+            same = close(pg_value, col_value, rel=0.05)
+        else:
+            same = close(pg_value, col_value)
+        if not same:
+            mismatches.append(field)
+    if mismatches:
+        print(f"  MISMATCH {name}: {', '.join(mismatches)}")
+    return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Postgres and columnar engines for the manager dashboards.")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over every branch and city")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the columnar snapshot first")
+    args = parser.parse_args()
+
+    if args.refresh:
+        from Fastapi.analytics_store import refresh_snapshot
+        refresh_snapshot(full=True)
+
+    pg = load_dashboard("postgres")
+    branches = pg.branch()
+    cities = pg.city()
+    pg_results = {
+        "branch": {b: pg.branch_dashboard(b) for b in branches},
+        "region": {c: pg.region_dashboard(c) for c in cities},
+    }
+    pg_timing = {
+        "branch": time_calls(pg.branch_dashboard, branches, args.repeat),
+        "region": time_calls(pg.region_dashboard, cities, args.repeat),
+    }
+
+    col = load_dashboard("columnar")
+    if not col.analytics_store.snapshot_exists():
+        raise SystemExit("No columnar snapshot found. Run with --refresh or python -m Fastapi.analytics_store")
+
+    agree = all(
+        compare_results(f"{kind} {key}", pg_results[kind][key], getattr(col, f"{kind}_dashboard")(key))
+        for kind, keys in (("branch", branches), ("region", cities)) for key in keys
+    )
+    col_timing = {
+        "branch": time_calls(col.branch_dashboard, branches, args.repeat),
+        "region": time_calls(col.region_dashboard, cities, args.repeat),
+    }
+
+    print(f"\n{'dashboard':<10} {'engine':<9} {'calls':>6} {'mean':>9} {'p50':>9} {'p95':>9}")
+    for kind in ("branch", "region"):
+        for engine, timing in (("postgres", pg_timing), ("columnar", col_timing)):
+            t = timing[kind]
+            print(f"{kind:<10} {engine:<9} {t['calls']:>6} {t['mean_ms']:>9} {t['p50_ms']:>9} {t['p95_ms']:>9}")
+
+    print(f"\nResults {'match' if agree else 'DIFFER'} between engines")
+    if not agree:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+
+from Fastapi.db import scatter, shard_count
+
+# -------------------------------------------------
+# LOAD TEST CONFIGURATION
+# -------------------------------------------------
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+ENDPOINTS = ["customer", "branch", "region", "branches", "cities"]
+
+
+# -------------------------------------------------
+# TARGETS: sample real keys from the seeded database
+# -------------------------------------------------
+
+def sample_accounts(cursor, sample_size):
+    cursor.execute("SELECT account_number FROM account_info ORDER BY random() LIMIT %s", (sample_size,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def load_targets(api_url, sample_size):
+    # Accounts from every shard, so customer requests spread over all of them
+    accounts = [a for shard_accounts in scatter(sample_accounts, sample_size) for a in shard_accounts]
+    random.shuffle(accounts)
+    accounts = accounts[:sample_size]
+
+    branches = requests.get(f"{api_url}/branches").json()
+    cities = requests.get(f"{api_url}/cities").json()
+
+    if not accounts or not branches or not cities:
+        sys.exit("No seeded data found. Run: python -m benchmarks.seed_data")
+
+    return {
+        "customer": [f"/customer/{quote(a)}" for a in accounts],
+        "branch": [f"/branch/{quote(b)}" for b in branches],
+        "region": [f"/region/{quote(c)}" for c in cities],
+        "branches": ["/branches"],
+        "cities": ["/cities"],
+    }
+
+
+# -------------------------------------------------
+# DRIVE ONE ENDPOINT AT ONE CONCURRENCY LEVEL
+# -------------------------------------------------
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_level(api_url, paths, concurrency, duration, warmup):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        session = requests.Session()
+
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+
+            path = rng.choice(paths)
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(f"{api_url}{path}", timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - t0) * 1000
+
+            if t0 < measure_from:
+                continue
+
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        session.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+
+    latencies.sort()
+    completed = len(latencies)
+
+    return {
+        "concurrency": concurrency,
+        "requests": completed,
+        "errors": errors,
+        "throughput_rps": round(completed / duration, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+# -------------------------------------------------
+# REPORTING AND REGRESSION CHECK
+# -------------------------------------------------
+
+def print_report(results):
+    print(f"\n{'endpoint':<10} {'conc':>5} {'req':>7} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for endpoint, levels in results["endpoints"].items():
+        for r in levels:
+            print(f"{endpoint:<10} {r['concurrency']:>5} {r['requests']:>7} {r['errors']:>5} "
+                  f"{r['throughput_rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    print(f"\nComparison against {baseline.get('label')} (tolerance {tolerance}%):")
+
+    for endpoint, levels in results["endpoints"].items():
+        base_levels = {r["concurrency"]: r for r in baseline["endpoints"].get(endpoint, [])}
+        for r in levels:
+            base = base_levels.get(r["concurrency"])
+            if not base or not base["p95_ms"]:
+                continue
+            change = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+            marker = "REGRESSION" if change > tolerance else ""
+            print(f"  {endpoint:<10} c={r['concurrency']:<4} p95 {base['p95_ms']:>9} -> {r['p95_ms']:>9} ({change:+.1f}%) {marker}")
+            if marker:
+                regressions.append((endpoint, r["concurrency"]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput benchmark for the dashboard API.")
+    parser.add_argument("--api-url", default=os.getenv("API_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per level")
+    parser.add_argument("--sample-accounts", type=int, default=500)
+    parser.add_argument("--label", default=datetime.now().strftime("%Y%m%d-%H%M%S"),
+                        help="Name of the results file in benchmarks/results/")
+    parser.add_argument("--compare", help="Baseline results JSON to check for p95 regressions")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="Allowed p95 increase in percent")
+    args = parser.parse_args()
+
+    targets = load_targets(args.api_url, args.sample_accounts)
+
+    results = {
+        "label": args.label,
+        "api_url": args.api_url,
+        "shards": shard_count(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "duration_s": args.duration,
+        "endpoints": {},
+    }
+
+    for endpoint in args.endpoints:
+        results["endpoints"][endpoint] = []
+        for concurrency in args.concurrency:
+            print(f"Benchmarking /{endpoint} at concurrency {concurrency}...")
+            level = run_level(args.api_url, targets[endpoint], concurrency, args.duration, args.warmup)
+            results["endpoints"][endpoint].append(level)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{args.label}.json")
+    with open(out_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_report(results)
+    print(f"\nResults saved to {out_path}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
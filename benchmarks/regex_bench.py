@@ -0,0 +1,97 @@
+import argparse
+import math
+import time
+
+import pdf_extractor
+from benchmarks.statement_corpus import FAMILIES, BASE_SIZES, CASES
+
+# -------------------------------------------------
+# STATEMENT PARSER REGRESSION BENCHMARK
+# Checks the edge cases in benchmarks/statement_corpus.py, then times every
+# parser on every corpus family at doubling input sizes and fits the growth
+# exponent (slope of log time against log size). Linear parsers come out near
+# 1.0; backtracking shows up as 2.0 and above. Exits 1 on a wrong parse or a
+# superlinear parser.
+# -------------------------------------------------
+
+PARSERS = ["extract_holder_name", "parse_account_info", "parse_account_summary", "parse_transactions"]
+
+# Timer noise and fixed per-call costs move the slope a little either way
+MAX_GROWTH_EXPONENT = 1.3
+
+# Each measurement repeats the call until it has run at least this long
+MIN_SAMPLE_S = 0.05
+
+
+def check_cases():
+    failures = 0
+    for name, text, parser, expected in CASES:
+        result = getattr(pdf_extractor, parser)(text)
+        ok = expected(result) if callable(expected) else result == expected
+        if not ok:
+            failures += 1
+            print(f"  FAIL {parser}: {name}\n       got {result!r}")
+    print(f"{len(CASES) - failures}/{len(CASES)} edge cases parsed as expected")
+    return failures == 0
+
+
+def time_call(fn, text, repeat):
+    best = math.inf
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            fn(text)
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_S:
+                break
+        best = min(best, elapsed / calls)
+    return best * 1000
+
+
+def growth_exponent(sizes, times_ms):
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-6)) for t in times_ms]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the statement parsers on the regex corpus and fail on superlinear growth.")
+    parser.add_argument("--steps", type=int, default=4, help="Input sizes per family (base size doubled each step)")
+    parser.add_argument("--repeat", type=int, default=3, help="Measurements per size, fastest is kept")
+    parser.add_argument("--max-exponent", type=float, default=MAX_GROWTH_EXPONENT)
+    parser.add_argument("--family", action="append", choices=sorted(FAMILIES), help="Only these families (repeatable)")
+    args = parser.parse_args()
+
+    cases_ok = check_cases()
+
+    print(f"\n{'family':<28} {'kind':<12} {'parser':<22} {'chars':>9} {'ms':>9} {'exponent':>9}")
+    superlinear = []
+    for family in args.family or FAMILIES:
+        kind, make_text = FAMILIES[family]
+        texts = [make_text(BASE_SIZES[family] * 2 ** step) for step in range(args.steps)]
+        sizes = [len(text) for text in texts]
+
+        for name in PARSERS:
+            fn = getattr(pdf_extractor, name)
+            times = [time_call(fn, text, args.repeat) for text in texts]
+            exponent = growth_exponent(sizes, times)
+            flag = ""
+            if exponent > args.max_exponent:
+                superlinear.append(f"{name} on {family}")
+                flag = "  SUPERLINEAR"
+            print(f"{family:<28} {kind:<12} {name:<22} {sizes[-1]:>9} {times[-1]:>9.3f} {exponent:>9.2f}{flag}")
+
+    if superlinear:
+        print(f"\nSuperlinear growth (exponent above {args.max_exponent}): {', '.join(superlinear)}")
+    if not cases_ok or superlinear:
+        raise SystemExit(1)
+    print("\nAll parsers scale linearly")
+
+
+if __name__ == "__main__":
+    main()
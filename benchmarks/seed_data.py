@@ -0,0 +1,363 @@
+import argparse
+import glob
+import os
+import random
+from datetime import date, timedelta
+
+from psycopg2.extras import execute_values
+
+from Fastapi.db import db_connection, shard_count, shard_for_account
+from jobs.build_sketches import run_build
+from pdf_extractor import categorize_transaction, get_category_version
+
+# -------------------------------------------------
+# SYNTHETIC BANK CONFIGURATION
+# -------------------------------------------------
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+
+CITIES = {
+    "Coimbatore": ["Gandhipuram", "RS Puram", "Peelamedu", "Saibaba Colony", "Singanallur"],
+    "Chennai": ["T Nagar", "Adyar", "Anna Nagar", "Velachery", "Tambaram"],
+    "Madurai": ["Anna Nagar", "KK Nagar", "Tallakulam"],
+    "Tiruppur": ["Avinashi Road", "Kumaran Road"],
+    "Salem": ["Fairlands", "Hasthampatti"],
+    "Erode": ["Perundurai Road", "Brough Road"],
+    "Trichy": ["Thillai Nagar", "Cantonment"],
+    "Bengaluru": ["Koramangala", "Indiranagar", "Jayanagar", "Whitefield"],
+}
+
+FIRST_NAMES = ["Arun", "Priya", "Karthik", "Divya", "Suresh", "Lakshmi", "Mohammed", "Anitha",
+               "Vignesh", "Meena", "Rahul", "Kavya", "Sanjay", "Deepa", "Ashwin", "Nithya"]
+LAST_NAMES = ["Kumar", "Raj", "Krishnan", "Subramanian", "Suhail", "Natarajan", "Iyer", "Reddy"]
+
+ACCOUNT_TYPES = ["Savings Account", "Salary Account", "Current Account"]
+
+# (description template, min amount, max amount, transactions per month)
+DEBIT_MERCHANTS = [
+    ("UPI/ZOMATO/{ref}/Food order", 150, 900, 3),
+    ("UPI/SWIGGY/{ref}/Food order", 120, 800, 3),
+    ("POS/DMART/{city}", 400, 4500, 2),
+    ("UPI/AMAZON/{ref}/Shopping", 300, 6000, 1),
+    ("UPI/UBER/{ref}/Ride", 90, 650, 4),
+    ("POS/INDIAN OIL/{city}", 500, 3000, 2),
+    ("BILLPAY/TANGEDCO/EB BILL", 600, 3500, 1),
+    ("BILLPAY/ACT FIBERNET/INTERNET BILL", 700, 1200, 1),
+    ("UPI/AIRTEL RECHARGE/{ref}", 199, 999, 1),
+    ("NEFT/HOUSE RENT/{ref}", 8000, 25000, 1),
+    ("ACH/NETFLIX/{ref}", 199, 649, 1),
+    ("ACH/AXISMUTUALFUND/SIP", 1000, 10000, 1),
+    ("ATM/CASH WDL/{city}", 500, 10000, 1),
+    ("EMI/HOME LOAN/{ref}", 9000, 30000, 1),
+    ("UPI/MEDPLUS/{ref}/Pharmacy", 100, 2000, 1),
+    ("UPI/BOOKMYSHOW/{ref}", 200, 1500, 1),
+]
+
+# (description template, min amount, max amount, share of accounts that pay it)
+# Paid once a month on a fixed day with a fixed amount per account. Drawn from their own
+# random stream, so the rest of a seeded bank matches seeds taken without them
+RECURRING_DEBITS = [
+    ("NEFT/LANDLORD RENT/{ref}", 8000, 25000, 0.5),
+    ("ACH/HOTSTAR/{ref}", 299, 1499, 0.4),
+    ("NACH/GROWW/SIP", 1000, 10000, 0.3),
+    ("EMI/CAR LOAN/{ref}", 9000, 30000, 0.2),
+    ("SI/HEALTH INSURANCE/{ref}", 500, 3000, 0.15),
+]
+
+CREDIT_SOURCES = [
+    ("NEFT/SALARY/PSG INDUSTRIES", 25000, 150000, 1),
+    ("UPI/{ref}/RECEIVED FROM FRIEND", 200, 5000, 1),
+    ("INT/CREDIT/SAVINGS INTEREST", 50, 1500, 0),
+]
+
+
+# -------------------------------------------------
+# APPLY SCHEMA (sql/*.sql in file order)
+# -------------------------------------------------
+
+def apply_schema(cursor):
+    for path in sorted(glob.glob(os.path.join(SCHEMA_DIR, "*.sql"))):
+        with open(path) as f:
+            cursor.execute(f.read())
+        print(f"Applied schema: {os.path.basename(path)}")
+
+
+def reset_data(cursor):
+    cursor.execute("TRUNCATE transactions, account_summary, account_info, processed_files, quarantined_files, branches, cities, branch_month_sketches RESTART IDENTITY CASCADE")
+
+
+# -------------------------------------------------
+# GENERATE SYNTHETIC DATA
+# -------------------------------------------------
+
+def build_branches(cities, branches_per_city):
+    branches = []
+    for city in list(CITIES)[:cities]:
+        for area in CITIES[city][:branches_per_city]:
+            branches.append(f"{city} - {area}")
+    return branches
+
+
+def seed_branches(cursor, branches):
+    execute_values(cursor, """
+        INSERT INTO cities (name) VALUES %s
+        ON CONFLICT (name) DO NOTHING
+        """, [(name,) for name in sorted({b.split(" - ")[0] for b in branches})])
+    execute_values(cursor, """
+        INSERT INTO branches (name, city_id)
+        SELECT v.name, c.id
+        FROM (VALUES %s) AS v (name, city)
+        JOIN cities c ON c.name = v.city
+        ON CONFLICT (name) DO NOTHING
+        """, [(b, b.split(" - ")[0]) for b in branches])
+    cursor.execute("SELECT name, id FROM branches WHERE name = ANY(%s)", (branches,))
+    return dict(cursor.fetchall())
+
+
+# Shards carry the main database's dimension rows under the same ids
+def copy_dimensions(cursor, shard_cursor):
+    cursor.execute("SELECT id, name FROM cities")
+    execute_values(shard_cursor, "INSERT INTO cities (id, name) VALUES %s ON CONFLICT DO NOTHING",
+                   cursor.fetchall())
+    cursor.execute("SELECT id, name, city_id FROM branches")
+    execute_values(shard_cursor, "INSERT INTO branches (id, name, city_id) VALUES %s ON CONFLICT DO NOTHING",
+                   cursor.fetchall())
+
+
+def month_starts(start, months):
+    year, month = start.year, start.month
+    for _ in range(months):
+        yield date(year, month, 1)
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def next_month(day):
+    return date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+
+
+def format_period(start, end):
+    return f"{start.strftime('%d-%m-%Y')} to {end.strftime('%d-%m-%Y')}"
+
+
+def generate_account(rng, recurring_rng, index, branches, start, months, txn_scale):
+    account_number = str(917010000000000 + index)
+    branch = branches[index % len(branches)]
+    city = branch.split(" - ")[0]
+
+    info = (
+        account_number,
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}".upper(),
+        rng.choice(ACCOUNT_TYPES),
+        f"UTIB000{rng.randint(1000, 9999)}",
+        branch,
+        f"CUST{rng.randint(100000, 999999)}",
+    )
+
+    balance = round(rng.uniform(-2000, 80000), 2)
+    spend_factor = rng.uniform(0.4, 1.3)
+
+    recurring = [
+        (template, round(recurring_rng.uniform(low, high), 2), recurring_rng.randint(1, 28))
+        for template, low, high, share in RECURRING_DEBITS
+        if recurring_rng.random() < share
+    ]
+
+    summaries = []
+    transactions = []
+    statement = None
+
+    for month_start in month_starts(start, months):
+
+        # One statement per quarter, the same shape process_pdf writes per PDF
+        if statement is None or month_start.month in (1, 4, 7, 10):
+            if statement:
+                summaries.append(statement)
+            statement = {
+                "start": month_start, "opening": balance,
+                "credits": 0.0, "debits": 0.0, "count": 0,
+            }
+
+        month_end = next_month(month_start) - timedelta(days=1)
+        rows = []
+
+        for template, low, high, per_month in CREDIT_SOURCES:
+            for _ in range(per_month if per_month else rng.choice([0, 0, 1])):
+                rows.append((template, rng.uniform(low, high), "CR"))
+
+        for template, low, high, per_month in DEBIT_MERCHANTS:
+            for _ in range(rng.randint(0, max(1, round(per_month * txn_scale)))):
+                rows.append((template, rng.uniform(low, high) * spend_factor, "DR"))
+
+        days = sorted(rng.randint(0, (month_end - month_start).days) for _ in rows)
+        rng.shuffle(rows)
+
+        # Each row draws its reference from the stream that generated it
+        rows = [(offset, template, amount, txn_type, rng) for offset, (template, amount, txn_type) in zip(days, rows)]
+        rows += [(day - 1, template, amount, "DR", recurring_rng) for template, amount, day in recurring]
+
+        for offset, template, amount, txn_type, ref_rng in sorted(rows, key=lambda r: r[0]):
+            amount = round(amount, 2)
+            ref = f"{ref_rng.randint(10**11, 10**12 - 1)}"
+            desc = template.format(ref=ref, city=city.upper())
+
+            if txn_type == "CR":
+                balance += amount
+                statement["credits"] += amount
+            else:
+                balance -= amount
+                statement["debits"] += amount
+            statement["count"] += 1
+
+            transactions.append((
+                account_number,
+                month_start + timedelta(days=offset),
+                desc,
+                f"TXN{ref}",
+                txn_type,
+                amount if txn_type == "DR" else 0.0,
+                amount if txn_type == "CR" else 0.0,
+                categorize_transaction(desc),
+                round(balance, 2),
+            ))
+
+        statement["end"] = month_end
+        statement["closing"] = round(balance, 2)
+
+    summaries.append(statement)
+
+    # account_info keeps the first statement period (ON CONFLICT DO NOTHING in process_pdf)
+    info = info + (format_period(summaries[0]["start"], summaries[0]["end"]),)
+
+    summary_rows = [
+        (account_number, format_period(s["start"], s["end"]), s["end"], round(s["opening"], 2),
+         round(s["credits"], 2), round(s["debits"], 2), s["closing"], s["count"])
+        for s in summaries
+    ]
+
+    return info, summary_rows, transactions
+
+
+# -------------------------------------------------
+# INSERT SYNTHETIC DATA
+# -------------------------------------------------
+
+def seed(args):
+    rng = random.Random(args.seed)
+    recurring_rng = random.Random(f"recurring-{args.seed}")
+    branches = build_branches(args.cities, args.branches_per_city)
+    start = date(date.today().year - args.years, 1, 1)
+    months = args.years * 12
+
+    # One connection per shard (a single one without SHARD_DSNS); accounts go to their hash shard
+    conns = [db_connection(shard) for shard in range(shard_count())]
+    cursors = [conn.cursor() for conn in conns]
+
+    for cursor in cursors:
+        apply_schema(cursor)
+        if args.reset:
+            reset_data(cursor)
+    branch_ids = seed_branches(cursors[0], branches)
+    for cursor in cursors[1:]:
+        copy_dimensions(cursors[0], cursor)
+    category_versions = [get_category_version(cursor) for cursor in cursors]
+    for conn in conns:
+        conn.commit()
+
+    batches = [([], [], []) for _ in conns]
+    total_txns = 0
+
+    def flush(shard):
+        cursor = cursors[shard]
+        info_batch, summary_batch, txn_batch = batches[shard]
+
+        execute_values(cursor, """
+            INSERT INTO account_info (account_number, holder_name, account_type, ifsc_code, branch, customer_id, statement_period, branch_id)
+            VALUES %s
+            ON CONFLICT (account_number) DO NOTHING
+            """, [(*info, branch_ids[info[4]]) for info in info_batch], page_size=1000)
+        execute_values(cursor, """
+            INSERT INTO account_summary (
+                account_number, statement_period, period_end, opening_balance,
+                total_credits, total_debits, closing_balance, total_transactions
+            )
+            VALUES %s
+            """, summary_batch, page_size=1000)
+        cursor.execute("""
+            INSERT INTO account_summary_current (
+                account_number, summary_id, statement_period, period_end, opening_balance,
+                total_credits, total_debits, closing_balance, total_transactions
+            )
+            SELECT DISTINCT ON (account_number)
+                account_number, id, statement_period, period_end, opening_balance,
+                total_credits, total_debits, closing_balance, total_transactions
+            FROM account_summary
+            WHERE account_number = ANY(%s)
+            ORDER BY account_number, period_end DESC
+            ON CONFLICT (account_number) DO NOTHING
+            """, ([info[0] for info in info_batch],))
+        execute_values(cursor, """
+            INSERT INTO transactions (
+                account_number, transaction_date, description,
+                reference, transaction_type, debit_amount,
+                credit_amount, category, balance, category_version
+            )
+            VALUES %s
+            """, [(*t, category_versions[shard]) for t in txn_batch], page_size=5000)
+        conns[shard].commit()
+        info_batch.clear()
+        summary_batch.clear()
+        txn_batch.clear()
+
+    pending = 0
+    for index in range(args.accounts):
+        info, summaries, transactions = generate_account(rng, recurring_rng, index, branches, start, months, args.txn_scale)
+        info_batch, summary_batch, txn_batch = batches[shard_for_account(info[0])]
+        info_batch.append(info)
+        summary_batch.extend(summaries)
+        txn_batch.extend(transactions)
+        total_txns += len(transactions)
+        pending += 1
+
+        if pending >= args.batch_size:
+            for shard in range(len(conns)):
+                if batches[shard][0]:
+                    flush(shard)
+            pending = 0
+            print(f"Seeded {index + 1}/{args.accounts} accounts ({total_txns} transactions)")
+
+    for shard in range(len(conns)):
+        if batches[shard][0]:
+            flush(shard)
+
+    for conn, cursor in zip(conns, cursors):
+        cursor.execute("ANALYZE")
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+    # The branch dashboard serves its totals from the sketches, which need the whole history
+    for shard in range(len(conns)):
+        run_build(shard=shard)
+
+    print(f"Seeding complete: {args.accounts} accounts, {len(branches)} branches, "
+          f"{total_txns} transactions across {len(conns)} shard(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed Postgres with a synthetic bank for benchmarking.")
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--cities", type=int, default=len(CITIES))
+    parser.add_argument("--branches-per-city", type=int, default=5)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--txn-scale", type=float, default=1.0,
+                        help="Multiplier for transactions per account per month")
+    parser.add_argument("--batch-size", type=int, default=200, help="Accounts per commit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Truncate existing data before seeding")
+    seed(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
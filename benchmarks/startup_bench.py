@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+# -------------------------------------------------
+# STARTUP BENCHMARK
+# Cold-start cost of each process, every sample in a fresh interpreter:
+#
+#   import   time to import the process's entry module, with its heaviest direct imports
+#   first    time from spawning the process to its first useful result:
+#              ingestion  `python pdf_extractor.py --parse` on a generated statement PDF
+#              api        uvicorn answering its first request, then the first DB-backed one
+#              streamlit  the first render of Streamlit/app.py (login page)
+#
+# Exits 1 when an import runs over its budget.
+# -------------------------------------------------
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (process, import statement, budget in ms)
+IMPORTS = [
+    ("ingestion", "import pdf_extractor", 250),
+    ("api", "import Fastapi.main", 800),
+    ("streamlit", "import sys; sys.path.insert(0, 'Streamlit'); import api_client", 1500),
+]
+
+
+def run_python(code, *args, timeout=120):
+    return subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT, capture_output=True,
+                          text=True, timeout=timeout)
+
+# -------------------------------------------------
+# IMPORT TIME
+# -------------------------------------------------
+
+def import_ms(statement):
+    result = run_python(f"import time; t = time.perf_counter(); {statement}; print((time.perf_counter() - t) * 1000)")
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(statement, module, top=3):
+    # -X importtime lists children before their parent; depth-1 lines just before the
+    # module's own line are its direct imports
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                            capture_output=True, text=True, timeout=120)
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                return sorted(children, reverse=True)[:top]
+            children = []
+        elif depth == 1:
+            children.append((int(cumulative) / 1000, name.strip()))
+    return []
+
+# -------------------------------------------------
+# TIME TO FIRST RESULT
+# -------------------------------------------------
+
+def sample_statement_pdf(path):
+    import fitz  # PyMuPDF
+    from benchmarks.statement_corpus import normal_statement
+
+    lines = normal_statement(40).splitlines()
+    with fitz.open() as doc:
+        for start in range(0, len(lines), 50):
+            doc.new_page().insert_text((40, 40), "\n".join(lines[start:start + 50]), fontsize=9)
+        doc.save(path)
+
+
+def ingestion_first_ms(pdf_path):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "pdf_extractor.py", "--parse", pdf_path], cwd=ROOT,
+                            capture_output=True, text=True, timeout=120)
+    elapsed = (time.perf_counter() - start) * 1000
+    # Newer PyMuPDF prints a deprecation notice for `import fitz` before the JSON
+    parsed = json.loads(result.stdout[result.stdout.find("{"):])
+    if not parsed["transactions"]:
+        raise RuntimeError("sample statement parsed to no transactions")
+    return elapsed
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def api_first_ms():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "Fastapi.main:app", "--port", str(port)],
+                              cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                if requests.get(f"{url}/", timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            if server.poll() is not None or time.perf_counter() - start > 60:
+                raise RuntimeError("API did not start")
+            time.sleep(0.01)
+        first = (time.perf_counter() - start) * 1000
+
+        # First request that opens a database connection (None when no database is reachable)
+        db_start = time.perf_counter()
+        try:
+            ok = requests.get(f"{url}/branches", timeout=30).status_code == 200
+        except requests.RequestException:
+            ok = False
+        first_db = (time.perf_counter() - db_start) * 1000 if ok else None
+    finally:
+        server.terminate()
+        server.wait()
+    return first, first_db
+
+
+def streamlit_first_ms():
+    result = run_python(
+        "import time; t = time.perf_counter()\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        "AppTest.from_file('Streamlit/app.py', default_timeout=60).run()\n"
+        "print((time.perf_counter() - t) * 1000)")
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+# -------------------------------------------------
+# REPORT
+# -------------------------------------------------
+
+def median_of(fn, repeat, *args):
+    return statistics.median(fn(*args) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time to first request for each process.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per measurement, median is reported")
+    parser.add_argument("--budget", action="append", default=[], metavar="PROCESS=MS",
+                        help="Override an import budget, e.g. --budget api=600")
+    args = parser.parse_args()
+
+    budgets = {name: budget for name, _, budget in IMPORTS}
+    for override in args.budget:
+        name, ms = override.split("=")
+        budgets[name] = float(ms)
+
+    print(f"{'process':<10} {'import ms':>10} {'budget':>8}  heaviest direct imports")
+    over_budget = []
+    for name, statement, _ in IMPORTS:
+        try:
+            ms = median_of(import_ms, args.repeat, statement)
+        except RuntimeError as e:
+            print(f"{name:<10} {'skipped':>10} {'':>8}  {e}")
+            continue
+        module = statement.rsplit("import ", 1)[1]
+        heavy = ", ".join(f"{mod} {cost:.0f}" for cost, mod in heaviest_imports(statement, module))
+        flag = ""
+        if ms > budgets[name]:
+            over_budget.append(name)
+            flag = "  OVER BUDGET"
+        print(f"{name:<10} {ms:>10.1f} {budgets[name]:>8g}  {heavy}{flag}")
+
+    print(f"\n{'process':<10} {'first result ms':>16}  measured")
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "statement.pdf")
+        sample_statement_pdf(pdf_path)
+        print(f"{'ingestion':<10} {median_of(ingestion_first_ms, args.repeat, pdf_path):>16.1f}  "
+              f"spawn to parsed JSON (pdf_extractor.py --parse)")
+
+    api_runs = [api_first_ms() for _ in range(args.repeat)]
+    print(f"{'api':<10} {statistics.median(r[0] for r in api_runs):>16.1f}  spawn to first response (GET /)")
+    db_runs = [r[1] for r in api_runs if r[1] is not None]
+    if db_runs:
+        print(f"{'':<10} {statistics.median(db_runs):>16.1f}  first GET /branches after that (database)")
+
+    try:
+        print(f"{'streamlit':<10} {median_of(streamlit_first_ms, args.repeat):>16.1f}  "
+              f"first render of the login page (AppTest)")
+    except RuntimeError as e:
+        print(f"{'streamlit':<10} {'skipped':>16}  {e}")
+
+    if over_budget:
+        print(f"\nImport over budget: {', '.join(over_budget)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
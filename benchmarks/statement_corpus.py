@@ -0,0 +1,170 @@
+import random
+
+# -------------------------------------------------
+# STATEMENT TEXT CORPUS FOR THE PDF PARSERS
+# Texts shaped like extract_text_from_pdf output. Every family is a function of a
+# size n (rows, lines or characters) so benchmarks/regex_bench.py can check how
+# parse time grows with input size:
+#
+#   normal       well-formed statements
+#   edge         layouts seen in real uploads; CASES pins the expected parse
+#   adversarial  malformed text that made the old patterns backtrack
+# -------------------------------------------------
+
+DESCRIPTIONS = [
+    "UPI/ZOMATO/412233/Food order",
+    "NEFT/SALARY/PSG INDUSTRIES",
+    "ACH/NETFLIX/99",
+    "ATM WDL/CHENNAI ADYAR",
+    "IMPS/P2P/RAVI KUMAR/Rent",
+    "POS/AMAZON PAY/IN",
+]
+
+
+def statement_text(rows, period="01 Jan 2024 to 31 Mar 2024", name="PRIYA RAMAN",
+                   branch="Chennai - Adyar", opening=10000.0):
+    balance = opening
+    credits = debits = 0.0
+    lines = []
+    for i, (txn_date, desc, txn_type, amount) in enumerate(rows):
+        if txn_type == "CR":
+            balance += amount
+            credits += amount
+        else:
+            balance -= amount
+            debits += amount
+        lines.append(f"{txn_date}\n{desc}\nREF{i:06d}\n{txn_type}\n{amount:,.2f}\n{balance:,.2f}")
+
+    return (
+        "AXIS BANK\n"
+        "Account Number: 917010012345678\n"
+        "Account Type: Savings Account\n"
+        "IFSC Code: UTIB0001234\n"
+        f"Branch: {branch}\n"
+        f"Statement Period: {period}\n"
+        "Customer ID: CUST123456\n"
+        f"Opening Balance\n₹ {opening:,.2f}\n"
+        f"Total Credits (+)\n₹ {credits:,.2f}\n"
+        f"Total Debits (-)\n₹ {debits:,.2f}\n"
+        f"Closing Balance\n₹ {balance:,.2f}\n"
+        f"Total Transactions\n{len(rows)}\n\n"
+        f"{name}\n{name}\n\n"
+        "Date\nTransaction Description\n"
+        + "\n".join(lines) + "\n"
+    )
+
+
+def random_rows(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        (f"{rng.randint(1, 28):02d}-{rng.randint(1, 3):02d}-2024", rng.choice(DESCRIPTIONS),
+         rng.choice(["DR", "DR", "CR"]), round(rng.uniform(10, 5000), 2))
+        for _ in range(n)
+    ]
+
+# -------------------------------------------------
+# NORMAL
+# -------------------------------------------------
+
+def normal_statement(n):
+    return statement_text(random_rows(n))
+
+
+def numeric_period(n):
+    return statement_text(random_rows(n), period="01-01-2024 to 31-03-2024")
+
+
+def wrapped_descriptions(n):
+    # Long descriptions wrap onto a second line in the PDF table
+    return statement_text([(d, f"{desc}/\nREMARKS {i}", t, a) for i, (d, desc, t, a) in enumerate(random_rows(n))])
+
+# -------------------------------------------------
+# ADVERSARIAL
+# -------------------------------------------------
+
+def name_block_without_header(n):
+    # Letters and spaces line after line with no "Date / Transaction Description" header
+    return statement_text([])[:-len("Date\nTransaction Description\n")] + "JOHN DOE SMITH\n" * n
+
+
+def labels_without_terminators(n):
+    # Field labels whose closing label never follows
+    return "Account Type: Savings\nBranch: Chennai\nStatement Period: 01-01-2024\n" * n
+
+
+def dates_without_rows(n):
+    # Dates that never complete a transaction row (no reference / DR / CR / amounts)
+    return "".join(f"{(i % 28) + 1:02d}-01-2024 balance carried forward\n" for i in range(n))
+
+
+def whitespace_after_labels(n):
+    # Summary labels followed by a long whitespace run and no amount
+    return "Opening Balance\n" + " " * n + "\nClosing Balance\n" + " " * n + "\nTotal Credits\n" + " " * n
+
+
+def long_description_run(n):
+    # One row whose description runs for n characters without reaching a reference
+    return "05-01-2024\n" + "UPI/" * (n // 4) + "\n"
+
+
+FAMILIES = {
+    "normal_statement": ("normal", normal_statement),
+    "numeric_period": ("normal", numeric_period),
+    "wrapped_descriptions": ("normal", wrapped_descriptions),
+    "name_block_without_header": ("adversarial", name_block_without_header),
+    "labels_without_terminators": ("adversarial", labels_without_terminators),
+    "dates_without_rows": ("adversarial", dates_without_rows),
+    "whitespace_after_labels": ("adversarial", whitespace_after_labels),
+    "long_description_run": ("adversarial", long_description_run),
+}
+
+# Base size per family; the benchmark scales it up by powers of two
+BASE_SIZES = {
+    "normal_statement": 250,
+    "numeric_period": 250,
+    "wrapped_descriptions": 250,
+    "name_block_without_header": 250,
+    "labels_without_terminators": 250,
+    "dates_without_rows": 250,
+    "whitespace_after_labels": 2000,
+    "long_description_run": 2000,
+}
+
+# -------------------------------------------------
+# EDGE CASES WITH EXPECTED RESULTS
+# (name, text, parser name, expected value or a check on the parsed value)
+# -------------------------------------------------
+
+def drop_balance(text, ref):
+    # The row loses its balance line, as when a page break cuts the table
+    lines = text.split("\n")
+    del lines[lines.index(ref) + 3]
+    return "\n".join(lines)
+
+
+CASES = [
+    ("numeric period keeps the first row", numeric_period(3), "parse_transactions",
+     lambda rows: [r[2] for r in rows] == ["REF000000", "REF000001", "REF000002"]),
+    ("numeric period row has its own description", numeric_period(3), "parse_transactions",
+     lambda rows: rows[0][1] == random_rows(3)[0][1]),
+    ("wrapped description keeps both lines", wrapped_descriptions(2), "parse_transactions",
+     lambda rows: len(rows) == 2 and rows[0][1].endswith("REMARKS 0")),
+    ("row missing its balance does not swallow the next row",
+     drop_balance(normal_statement(3), "REF000001"), "parse_transactions",
+     lambda rows: [r[2] for r in rows] == ["REF000000", "REF000002"] and "REF000001" not in rows[1][1]),
+    ("holder name with initials", statement_text(random_rows(1), name="R. K. SHARMA"), "extract_holder_name",
+     "R. K. SHARMA"),
+    ("holder name does not reach into the summary", name_block_without_header(3), "extract_holder_name", ""),
+    ("branch on its own line", normal_statement(1).replace("Branch: ", "Branch:\n"), "parse_account_info",
+     lambda info: info["branch"] == "Chennai - Adyar"),
+    ("numeric period is read whole", numeric_period(1), "parse_account_info",
+     lambda info: info["statement_period"] == "01-01-2024 to 31-03-2024"),
+    ("missing IFSC label leaves account type empty",
+     normal_statement(1).replace("IFSC Code: UTIB0001234\n", ""), "parse_account_info",
+     lambda info: info["account_type"] == "" and info["branch"] == "Chennai - Adyar"),
+    ("rupee sign on its own line before the amount",
+     normal_statement(1).replace("Opening Balance\n₹ ", "Opening Balance\n₹\n"), "parse_account_summary",
+     lambda summary: summary["opening_balance"] == "10,000.00"),
+    ("amount without currency sign", normal_statement(1).replace("Closing Balance\n₹ ", "Closing Balance\n"),
+     "parse_account_summary", lambda summary: summary["closing_balance"] != ""),
+]
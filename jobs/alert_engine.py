@@ -0,0 +1,187 @@
+import argparse
+import io
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from Fastapi.db import db_connection, scatter, shard_count
+
+# -------------------------------------------------
+# ALERT RULES
+# Each rule is evaluated over a whole chunk of accounts at once: `condition`
+# takes the account DataFrame and returns a boolean Series. Add a rule by
+# appending to ALERT_RULES; its position sets the display order. Opt-in rules
+# are appended after them when requested on the command line.
+# -------------------------------------------------
+
+AlertRule = namedtuple("AlertRule", ["name", "message", "condition"])
+
+DORMANT_AFTER_DAYS = 180
+
+ALERT_RULES = [
+    AlertRule(
+        "negative_balance",
+        "Negative Balance Warning: Your account is overdrawn. Please deposit funds to avoid penalties.",
+        lambda df: df["closing_balance"] < 0,
+    ),
+    AlertRule(
+        "high_spending",
+        "High Spending Alert: Your outgoing transactions exceed your incoming transactions. Consider reviewing your spending habits.",
+        lambda df: df["total_debits"] > df["total_credits"],
+    ),
+    AlertRule(
+        "low_savings",
+        "Low Savings Rate: Your savings rate is below 10%. Consider increasing your savings to build a stronger financial future.",
+        lambda df: df["savings_rate"] < 10,
+    ),
+]
+
+# Opt-in (--dormant): accounts without any transactions are not flagged
+DORMANT_ACCOUNT_RULE = AlertRule(
+    "dormant_account",
+    f"Dormant Account: No transactions in the last {DORMANT_AFTER_DAYS} days. Keep your account active to avoid dormancy charges.",
+    lambda df: df["days_since_last_txn"] > DORMANT_AFTER_DAYS,
+)
+
+# -------------------------------------------------
+# BULK LOAD: latest summary + transaction aggregates for every account
+# -------------------------------------------------
+
+ACCOUNT_FEATURES_SQL = """
+    WITH txn AS (
+        SELECT account_number, COUNT(*) AS txn_count, MAX(transaction_date) AS last_txn_date
+        FROM transactions
+        GROUP BY account_number
+    )
+    SELECT s.account_number, s.closing_balance, s.total_credits, s.total_debits,
+        COALESCE(txn.txn_count, 0), txn.last_txn_date
+    FROM account_summary_current s
+    LEFT JOIN txn ON txn.account_number = s.account_number
+    """
+
+FEATURE_COLUMNS = ["account_number", "closing_balance", "total_credits", "total_debits",
+                   "txn_count", "last_txn_date"]
+
+
+def load_account_chunks(conn, chunk_size):
+    # Server-side cursor: millions of accounts are streamed, never held at once
+    cursor = conn.cursor(name="alert_engine_scan")
+    cursor.itersize = chunk_size
+    cursor.execute(ACCOUNT_FEATURES_SQL, name="alerts.account_features")
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+
+    cursor.close()
+
+# -------------------------------------------------
+# VECTORISED RULE EVALUATION
+# -------------------------------------------------
+
+def prepare_features(df, as_of):
+    for col in ("closing_balance", "total_credits", "total_debits"):
+        df[col] = df[col].astype(float)
+
+    credits = df["total_credits"].to_numpy()
+    net_cash_flow = credits - df["total_debits"].to_numpy()
+    df["savings_rate"] = np.divide(net_cash_flow * 100, credits, out=np.zeros_like(credits), where=credits > 0)
+
+    last_txn = pd.to_datetime(df["last_txn_date"])
+    # NaN for accounts without transactions, so no comparison flags them
+    df["days_since_last_txn"] = (pd.Timestamp(as_of) - last_txn).dt.days
+    return df
+
+
+def evaluate_rules(df, rules):
+    flagged = []
+    for order, rule in enumerate(rules):
+        hits = df.loc[rule.condition(df).to_numpy(), "account_number"]
+        if not hits.empty:
+            flagged.append(pd.DataFrame({
+                "account_number": hits.to_numpy(),
+                "rule": rule.name,
+                "rule_order": order,
+                "message": rule.message,
+            }))
+
+    if not flagged:
+        return pd.DataFrame(columns=["account_number", "rule", "rule_order", "message"])
+    return pd.concat(flagged, ignore_index=True)
+
+# -------------------------------------------------
+# WRITE: stage with COPY, then swap the table contents in one transaction
+# -------------------------------------------------
+
+def copy_alerts(cursor, alerts, computed_at):
+    buffer = io.StringIO()
+    alerts.assign(computed_at=computed_at).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert("""
+        COPY account_alerts_staging (account_number, rule, rule_order, message, computed_at)
+        FROM STDIN WITH (FORMAT csv)
+        """, buffer)
+
+
+def latest_transaction_date(cursor):
+    # Statements land in batches, so dormancy is measured against the newest data, not today;
+    # None when the shard has no transactions
+    cursor.execute("SELECT MAX(transaction_date) FROM transactions", name="alerts.latest_date")
+    return cursor.fetchone()[0]
+
+
+def run_alert_engine(chunk_size=200000, rules=ALERT_RULES, as_of=None, shard=0):
+    started = time.perf_counter()
+    computed_at = datetime.now()
+
+    read_conn = db_connection(shard)
+    write_conn = db_connection(shard)
+    cursor = write_conn.cursor()
+
+    as_of = as_of or latest_transaction_date(cursor) or date.today()
+
+    cursor.execute("""
+        CREATE TEMP TABLE account_alerts_staging
+        (LIKE account_alerts INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+
+    accounts = 0
+    flagged = 0
+    for chunk in load_account_chunks(read_conn, chunk_size):
+        alerts = evaluate_rules(prepare_features(chunk, as_of), rules)
+        copy_alerts(cursor, alerts, computed_at)
+        accounts += len(chunk)
+        flagged += len(alerts)
+        print(f"Evaluated {accounts} accounts, {flagged} alerts so far")
+
+    # Readers keep seeing the previous run until this commits
+    cursor.execute("DELETE FROM account_alerts")
+    cursor.execute("INSERT INTO account_alerts SELECT * FROM account_alerts_staging")
+    write_conn.commit()
+
+    cursor.close()
+    write_conn.close()
+    read_conn.close()
+
+    print(f"Alert engine complete: {accounts} accounts, {flagged} alerts "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate alert rules for every account and refresh account_alerts.")
+    parser.add_argument("--chunk-size", type=int, default=200000, help="Accounts evaluated per batch")
+    parser.add_argument("--shard", type=int, help="Run on this shard only (default: every shard in turn)")
+    parser.add_argument("--dormant", action="store_true",
+                        help=f"Also flag accounts with no transactions in the last {DORMANT_AFTER_DAYS} days")
+    args = parser.parse_args()
+    rules = ALERT_RULES + [DORMANT_ACCOUNT_RULE] if args.dormant else ALERT_RULES
+
+    # Same dormancy reference date on every shard; shards without transactions have none
+    as_of = max((d for d in scatter(latest_transaction_date) if d is not None), default=date.today())
+    for shard in [args.shard] if args.shard is not None else range(shard_count()):
+        run_alert_engine(chunk_size=args.chunk_size, rules=rules, as_of=as_of, shard=shard)
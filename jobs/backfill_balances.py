@@ -0,0 +1,76 @@
+import argparse
+import time
+
+from Fastapi.db import db_connection, shard_count
+
+# -------------------------------------------------
+# RUNNING BALANCE BACKFILL
+# Fills transactions.balance (sql/008_transaction_balances.sql) for rows loaded
+# before ingestion stored it: the account's earliest opening balance plus the
+# running sum of credits minus debits in (date, id) order. Summaries without a
+# period_end predate period-versioned statements, so they count as the earliest.
+# One batch of accounts per transaction, so an interrupted run resumes where it
+# stopped.
+# -------------------------------------------------
+
+
+def backfill_accounts(cursor, accounts):
+    cursor.execute("""
+        WITH opening AS (
+            SELECT DISTINCT ON (account_number) account_number, opening_balance
+            FROM account_summary
+            WHERE account_number = ANY(%(accounts)s)
+            ORDER BY account_number, period_end NULLS FIRST, id
+        ),
+        running AS (
+            SELECT t.id,
+            o.opening_balance + SUM(t.credit_amount - t.debit_amount) OVER (
+                PARTITION BY t.account_number ORDER BY t.transaction_date, t.id) AS balance
+            FROM transactions t
+            JOIN opening o ON o.account_number = t.account_number
+            WHERE t.account_number = ANY(%(accounts)s)
+        )
+        UPDATE transactions t
+        SET balance = r.balance
+        FROM running r
+        WHERE t.id = r.id AND t.balance IS NULL
+        """, {"accounts": accounts}, name="balances.backfill")
+    return cursor.rowcount
+
+
+def run_backfill(batch_size=500, pause_s=0.1, shard=0):
+    conn = db_connection(shard)
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT DISTINCT account_number
+        FROM transactions
+        WHERE balance IS NULL
+        ORDER BY account_number
+        """, name="balances.pending_accounts")
+    accounts = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+
+    print(f"Backfilling running balances for {len(accounts)} accounts")
+    updated = 0
+
+    for i in range(0, len(accounts), batch_size):
+        updated += backfill_accounts(cursor, accounts[i:i + batch_size])
+        conn.commit()
+        print(f"{min(i + batch_size, len(accounts))}/{len(accounts)} accounts done, {updated} rows updated")
+        time.sleep(pause_s)
+
+    cursor.close()
+    conn.close()
+
+    print(f"Balance backfill complete: {updated} rows updated")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill transactions.balance for rows ingested before it was stored.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Accounts per update transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between batches")
+    parser.add_argument("--shard", type=int, help="Run on this shard only (default: every shard in turn)")
+    args = parser.parse_args()
+    for shard in [args.shard] if args.shard is not None else range(shard_count()):
+        run_backfill(batch_size=args.batch_size, pause_s=args.pause, shard=shard)
@@ -0,0 +1,106 @@
+import argparse
+import time
+
+import psycopg2
+from psycopg2.extras import execute_values, Json
+
+from Fastapi.db import db_connection, shard_count
+from Fastapi.sketches import HyperLogLog, TDigest
+
+# -------------------------------------------------
+# REBUILD BRANCH x MONTH SKETCHES FROM HISTORY
+# Ingestion keeps branch_month_sketches current; this job builds them for data
+# loaded before sql/007_branch_month_sketches.sql (or by benchmarks/seed_data.py)
+# and after history has been rewritten, e.g. by jobs/dedupe_transactions.py.
+# -------------------------------------------------
+
+# Month-end balance walked back from the latest closing balance:
+# closing - net movement of every later month
+ACCOUNT_MONTHS_SQL = """
+    WITH monthly AS (
+        SELECT account_number, DATE_TRUNC('month', transaction_date)::date AS month,
+        SUM(credit_amount - debit_amount) AS net,
+        COUNT(*) AS transaction_count, SUM(debit_amount) AS debits, SUM(credit_amount) AS credits
+        FROM transactions
+        GROUP BY account_number, month
+    )
+    SELECT a.branch, m.month, m.account_number,
+    (s.closing_balance - COALESCE(SUM(m.net) OVER (
+        PARTITION BY m.account_number ORDER BY m.month DESC
+        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0))::float8,
+    m.transaction_count, m.debits, m.credits
+    FROM monthly m
+    JOIN account_info a ON a.account_number = m.account_number
+    LEFT JOIN account_summary_current s ON s.account_number = m.account_number
+    WHERE a.branch IS NOT NULL
+    ORDER BY a.branch, m.month
+    """
+
+
+def build_sketch(branch, month, accounts, balances, totals):
+    customers = HyperLogLog()
+    customers.update(accounts)
+    digest = TDigest()
+    digest.update(b for b in balances if b is not None)
+    return (branch, month, psycopg2.Binary(customers.to_bytes()), Json(digest.to_json()), *totals)
+
+
+def load_sketches(conn, chunk_size):
+    cursor = conn.cursor(name="sketch_scan")
+    cursor.itersize = chunk_size
+    cursor.execute(ACCOUNT_MONTHS_SQL, name="sketches.account_months")
+
+    key = None
+    accounts = []
+    balances = []
+    totals = (0, 0, 0)
+    for branch, month, account_number, balance, count, debits, credits in cursor:
+        if (branch, month) != key:
+            if key:
+                yield build_sketch(*key, accounts, balances, totals)
+            key = (branch, month)
+            accounts = []
+            balances = []
+            totals = (0, 0, 0)
+        accounts.append(account_number)
+        balances.append(balance)
+        totals = (totals[0] + count, totals[1] + (debits or 0), totals[2] + (credits or 0))
+
+    if key:
+        yield build_sketch(*key, accounts, balances, totals)
+    cursor.close()
+
+
+def run_build(chunk_size=200000, shard=0):
+    started = time.perf_counter()
+
+    # Each shard keeps sketches of its own accounts; the dashboards merge them
+    read_conn = db_connection(shard)
+    write_conn = db_connection(shard)
+    cursor = write_conn.cursor()
+
+    sketches = list(load_sketches(read_conn, chunk_size))
+
+    # Readers keep seeing the previous sketches until this commits
+    cursor.execute("DELETE FROM branch_month_sketches")
+    execute_values(cursor, """
+        INSERT INTO branch_month_sketches (branch, month, customers_hll, balance_digest,
+            transaction_count, debits, credits)
+        VALUES %s
+        """, sketches, page_size=500)
+    write_conn.commit()
+
+    cursor.close()
+    write_conn.close()
+    read_conn.close()
+
+    print(f"Built {len(sketches)} branch-month sketches in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild branch_month_sketches from the full transaction history.")
+    parser.add_argument("--chunk-size", type=int, default=200000, help="Rows fetched per round trip")
+    parser.add_argument("--shard", type=int, help="Run on this shard only (default: every shard in turn)")
+    args = parser.parse_args()
+    for shard in [args.shard] if args.shard is not None else range(shard_count()):
+        run_build(chunk_size=args.chunk_size, shard=shard)
@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+
+from Fastapi.db import db_connection, shard_count
+
+# -------------------------------------------------
+# ONE-OFF DEDUPE OF EXISTING TRANSACTION HISTORY
+# Deletes rows that repeat an earlier row's natural key, one id range per
+# transaction so locks stay short, then builds the unique natural-key index
+# (sql/004_transaction_natural_key.sql) without blocking writes.
+# -------------------------------------------------
+
+NATURAL_KEY = "account_number, reference, transaction_date, debit_amount, credit_amount"
+
+
+def create_index(conn, name, unique=False):
+    # CONCURRENTLY cannot run inside a transaction block
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    # A failed concurrent build leaves an invalid index behind that IF NOT EXISTS would keep
+    cursor.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (name,))
+    row = cursor.fetchone()
+    if row and not row[0]:
+        cursor.execute(f"DROP INDEX CONCURRENTLY {name}")
+
+    print(f"Building index {name}...")
+    cursor.execute(f"""
+        CREATE {"UNIQUE " if unique else ""}INDEX CONCURRENTLY IF NOT EXISTS {name}
+        ON transactions ({NATURAL_KEY})
+        """)
+    cursor.close()
+    conn.autocommit = False
+
+
+def drop_index(conn, name):
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    cursor.close()
+    conn.autocommit = False
+
+
+def dedupe_chunk(cursor, low, high):
+    # Keep the lowest id of every natural key; only rows inside [low, high) are touched
+    cursor.execute("""
+        DELETE FROM transactions t
+        WHERE t.id >= %s AND t.id < %s
+        AND EXISTS (
+            SELECT 1
+            FROM transactions o
+            WHERE o.account_number = t.account_number
+            AND o.reference = t.reference
+            AND o.transaction_date = t.transaction_date
+            AND o.debit_amount = t.debit_amount
+            AND o.credit_amount = t.credit_amount
+            AND o.id < t.id
+        )
+        """, (low, high), name="dedupe.chunk")
+    return cursor.rowcount
+
+
+def run_dedupe(chunk_size=50000, pause_s=0.1, start_id=None, shard=0):
+    conn = db_connection(shard)
+
+    # Helper index makes each EXISTS probe an index lookup while duplicates still exist
+    create_index(conn, "idx_transactions_natural_key_dedupe")
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(id), MAX(id) FROM transactions")
+    min_id, max_id = cursor.fetchone()
+    conn.commit()
+
+    removed = 0
+    if min_id is None:
+        print("No transactions to dedupe.")
+    else:
+        low = max(start_id or min_id, min_id)
+
+        while low <= max_id:
+            high = low + chunk_size
+            removed += dedupe_chunk(cursor, low, high)
+            conn.commit()
+            print(f"Deduped ids {low}..{high - 1}: {removed} duplicates removed so far")
+
+            low = high
+            time.sleep(pause_s)
+
+        print(f"Dedupe complete: {removed} duplicate transactions removed")
+
+    cursor.close()
+
+    # Rows inserted concurrently by an older ingestion build can make this fail;
+    # re-run with --start-id set to the last chunk reported above
+    create_index(conn, "uq_transactions_natural_key", unique=True)
+    drop_index(conn, "idx_transactions_natural_key_dedupe")
+    conn.close()
+
+    print("Unique natural-key index is in place.")
+    return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate transactions in id-range chunks.")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Ids per delete transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between chunks")
+    parser.add_argument("--start-id", type=int, help="Resume from this id")
+    parser.add_argument("--shard", type=int, help="Run on this shard only (default: every shard in turn)")
+    args = parser.parse_args()
+    removed = 0
+    for shard in [args.shard] if args.shard is not None else range(shard_count()):
+        removed += run_dedupe(chunk_size=args.chunk_size, pause_s=args.pause, start_id=args.start_id, shard=shard)
+
+    # The columnar snapshot only appends rows above its id watermark and never sees deletes
+    if removed and os.getenv("ANALYTICS_ENGINE", "postgres") == "columnar":
+        from Fastapi.analytics_store import refresh_snapshot
+        refresh_snapshot(full=True)
@@ -0,0 +1,122 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psycopg2.extras import execute_values
+
+from Fastapi.db import db_connection, shard_count
+from pdf_extractor import categorize_transaction, get_category_version
+
+# -------------------------------------------------
+# CATEGORY BACKFILL
+# Recomputes `category` for rows tagged with an older ruleset version. Work is
+# split into id ranges processed in parallel, each committed on its own, so an
+# interrupted run simply resumes: finished rows are no longer stale.
+# -------------------------------------------------
+
+
+class RateLimiter:
+    """Shared rows-per-second budget across all workers."""
+
+    def __init__(self, rows_per_second):
+        self.rows_per_second = rows_per_second
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def wait(self, rows):
+        if not self.rows_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + rows / self.rows_per_second
+        time.sleep(max(0.0, start - now))
+
+
+def recategorize_chunk(low, high, version, limiter, shard=0):
+    conn = db_connection(shard)
+    cursor = conn.cursor()
+
+    # Keep backfill queries short so they cannot pile up behind dashboard traffic
+    cursor.execute("SET statement_timeout = '30s'")
+
+    cursor.execute("""
+        SELECT id, description
+        FROM transactions
+        WHERE id >= %s AND id < %s
+        AND category_version IS DISTINCT FROM %s
+        """, (low, high, version), name="recategorize.select")
+
+    updates = [
+        (row_id, categorize_transaction(description or ""), version)
+        for row_id, description in cursor.fetchall()
+    ]
+
+    if updates:
+        limiter.wait(len(updates))
+        execute_values(cursor, """
+            UPDATE transactions AS t
+            SET category = v.category, category_version = v.version
+            FROM (VALUES %s) AS v (id, category, version)
+            WHERE t.id = v.id
+            """, updates, page_size=1000)
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    return len(updates)
+
+
+def run_backfill(chunk_size=20000, workers=4, rows_per_second=20000, start_id=None, shard=0):
+    conn = db_connection(shard)
+    cursor = conn.cursor()
+
+    version = get_category_version(cursor)
+    cursor.execute("SELECT MIN(id), MAX(id) FROM transactions")
+    min_id, max_id = cursor.fetchone()
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    if min_id is None:
+        print("No transactions to recategorize.")
+        return
+
+    low = max(start_id or min_id, min_id)
+    ranges = [(lo, min(lo + chunk_size, max_id + 1)) for lo in range(low, max_id + 1, chunk_size)]
+    print(f"Recategorizing ids {low}..{max_id} to ruleset v{version} "
+          f"in {len(ranges)} chunks with {workers} workers")
+
+    limiter = RateLimiter(rows_per_second)
+    updated = 0
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(recategorize_chunk, lo, hi, version, limiter, shard): (lo, hi) for lo, hi in ranges}
+        for future in as_completed(futures):
+            lo, hi = futures[future]
+            try:
+                updated += future.result()
+            except Exception as e:
+                print(f"Chunk {lo}..{hi - 1} failed, re-run to retry: {e}")
+                continue
+            done += 1
+            if done % 10 == 0 or done == len(ranges):
+                print(f"{done}/{len(ranges)} chunks done, {updated} rows recategorized")
+
+    print(f"Backfill complete: {updated} rows moved to ruleset v{version}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute categories for rows tagged with an older ruleset.")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Ids per chunk (one transaction each)")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks processed in parallel")
+    parser.add_argument("--rows-per-second", type=int, default=20000,
+                        help="Throttle across all workers, 0 for unthrottled")
+    parser.add_argument("--start-id", type=int, help="Skip ids below this one")
+    parser.add_argument("--shard", type=int, help="Run on this shard only (default: every shard in turn)")
+    args = parser.parse_args()
+    for shard in [args.shard] if args.shard is not None else range(shard_count()):
+        run_backfill(args.chunk_size, args.workers, args.rows_per_second, args.start_id, shard)
@@ -0,0 +1,194 @@
+import argparse
+import io
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Fastapi.db import db_connection, shard_count
+
+# -------------------------------------------------
+# RECURRING PAYMENT DETECTION
+# Groups every debit in the bank by account + normalised merchant, sorts once,
+# and classifies each group from the spread of its payment intervals and amounts.
+# -------------------------------------------------
+
+# (frequency, lowest median interval, highest median interval) in days
+FREQUENCIES = [
+    ("weekly", 5, 9),
+    ("fortnightly", 12, 17),
+    ("monthly", 26, 35),
+    ("quarterly", 80, 100),
+    ("yearly", 345, 385),
+]
+
+MIN_OCCURRENCES = 3
+MAX_INTERVAL_CV = 0.3   # std / mean of the days between payments
+MAX_AMOUNT_CV = 0.5     # std / mean of the amounts; utility bills vary, rent and SIPs do not
+
+# Payment rails and reference noise, stripped before grouping by merchant. Loan EMIs and
+# standing instructions name the payee after the rail, so "EMI/HOME LOAN/123" and
+# "EMI/CAR LOAN/456" are two merchants, not one "EMI"
+CHANNEL_PREFIX = r"^(?:UPI|NEFT|IMPS|RTGS|ACH|NACH|ECS|POS|BILLPAY|MB|IB|EMI|SI)/"
+
+DEBITS_SQL = """
+    SELECT account_number, transaction_date, debit_amount, description, category
+    FROM transactions
+    WHERE debit_amount > 0
+    ORDER BY account_number
+    """
+
+COLUMNS = ["account_number", "transaction_date", "amount", "description", "category"]
+
+OUTPUT_COLUMNS = ["account_number", "merchant", "category", "frequency", "interval_days",
+                  "average_amount", "occurrences", "first_date", "last_date",
+                  "next_expected", "confidence"]
+
+
+def normalise_merchant(descriptions):
+    cleaned = (descriptions.fillna("").str.upper()
+               .str.replace(CHANNEL_PREFIX, "", regex=True)
+               .str.replace(r"[^A-Z/ ]+", " ", regex=True))
+    # First run of words within one segment: "UPI/ZOMATO/412345/Food order" -> "ZOMATO"
+    merchant = cleaned.str.extract(r"([A-Z][A-Z ]*[A-Z]|[A-Z])", expand=False)
+    return merchant.fillna("UNKNOWN").str.replace(r"\s+", " ", regex=True).str.slice(0, 100)
+
+
+def load_debit_chunks(conn, chunk_size):
+    # Streams debits ordered by account; rows of the last account in a batch are
+    # held back so that every account is analysed with its complete history
+    cursor = conn.cursor(name="recurring_scan")
+    cursor.itersize = chunk_size
+    cursor.execute(DEBITS_SQL, name="recurring.debits")
+
+    carry = []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        rows = carry + rows
+        last_account = rows[-1][0]
+        split = len(rows)
+        while split > 0 and rows[split - 1][0] == last_account:
+            split -= 1
+        if split == 0:
+            carry = rows
+            continue
+        carry = rows[split:]
+        yield pd.DataFrame(rows[:split], columns=COLUMNS)
+
+    if carry:
+        yield pd.DataFrame(carry, columns=COLUMNS)
+    cursor.close()
+
+
+def detect_recurring(df):
+    df["merchant"] = normalise_merchant(df["description"])
+    df["amount"] = df["amount"].astype(float)
+    df["transaction_date"] = pd.to_datetime(df["transaction_date"])
+    df = df.sort_values(["account_number", "merchant", "category", "transaction_date"], ignore_index=True)
+
+    keys = ["account_number", "merchant", "category"]
+    group_id = df.groupby(keys, sort=False).ngroup().to_numpy()
+
+    # Interval to the previous payment of the same group; NaN at each group start
+    days = df["transaction_date"].diff().dt.days.to_numpy(dtype=float, copy=True)
+    days[np.r_[True, group_id[1:] != group_id[:-1]]] = np.nan
+    df["interval"] = days
+
+    grouped = df.groupby(keys, sort=False)
+    stats = grouped.agg(
+        occurrences=("amount", "size"),
+        average_amount=("amount", "mean"),
+        amount_std=("amount", "std"),
+        interval_days=("interval", "median"),
+        interval_mean=("interval", "mean"),
+        interval_std=("interval", "std"),
+        first_date=("transaction_date", "min"),
+        last_date=("transaction_date", "max"),
+    ).reset_index()
+
+    interval_cv = (stats["interval_std"].fillna(0) / stats["interval_mean"]).to_numpy()
+    amount_cv = (stats["amount_std"].fillna(0) / stats["average_amount"]).to_numpy()
+    median = stats["interval_days"].to_numpy()
+
+    frequency = np.select(
+        [(median >= low) & (median <= high) for _, low, high in FREQUENCIES],
+        [name for name, _, _ in FREQUENCIES],
+        default="",
+    )
+
+    recurring = (
+        (stats["occurrences"].to_numpy() >= MIN_OCCURRENCES)
+        & (frequency != "")
+        & (interval_cv <= MAX_INTERVAL_CV)
+        & (amount_cv <= MAX_AMOUNT_CV)
+    )
+
+    stats["frequency"] = frequency
+    stats["confidence"] = np.clip(1 - (interval_cv / MAX_INTERVAL_CV + amount_cv / MAX_AMOUNT_CV) / 4, 0, 1)
+    stats = stats[recurring].copy()
+
+    stats["next_expected"] = stats["last_date"] + pd.to_timedelta(stats["interval_days"].round(), unit="D")
+    for col in ("first_date", "last_date", "next_expected"):
+        stats[col] = stats[col].dt.date
+    stats["interval_days"] = stats["interval_days"].round(1)
+    stats["average_amount"] = stats["average_amount"].round(2)
+    stats["confidence"] = stats["confidence"].round(3)
+
+    return stats[OUTPUT_COLUMNS]
+
+
+def copy_recurring(cursor, payments, computed_at):
+    buffer = io.StringIO()
+    payments.assign(computed_at=computed_at).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"""
+        COPY recurring_payments_staging ({", ".join(OUTPUT_COLUMNS)}, computed_at)
+        FROM STDIN WITH (FORMAT csv)
+        """, buffer)
+
+
+def run_detection(chunk_size=500000, shard=0):
+    started = time.perf_counter()
+    computed_at = datetime.now()
+
+    read_conn = db_connection(shard)
+    write_conn = db_connection(shard)
+    cursor = write_conn.cursor()
+
+    cursor.execute("""
+        CREATE TEMP TABLE recurring_payments_staging
+        (LIKE recurring_payments INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+
+    debits = 0
+    found = 0
+    for chunk in load_debit_chunks(read_conn, chunk_size):
+        payments = detect_recurring(chunk)
+        copy_recurring(cursor, payments, computed_at)
+        debits += len(chunk)
+        found += len(payments)
+        print(f"Scanned {debits} debits, {found} recurring payments so far")
+
+    # Readers keep seeing the previous run until this commits
+    cursor.execute("DELETE FROM recurring_payments")
+    cursor.execute("INSERT INTO recurring_payments SELECT * FROM recurring_payments_staging")
+    write_conn.commit()
+
+    cursor.close()
+    write_conn.close()
+    read_conn.close()
+
+    print(f"Recurring payment detection complete: {found} recurring payments "
+          f"from {debits} debits in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect recurring debits for every account and refresh recurring_payments.")
+    parser.add_argument("--chunk-size", type=int, default=500000, help="Debits analysed per batch")
+    parser.add_argument("--shard", type=int, help="Run on this shard only (default: every shard in turn)")
+    args = parser.parse_args()
+    for shard in [args.shard] if args.shard is not None else range(shard_count()):
+        run_detection(chunk_size=args.chunk_size, shard=shard)
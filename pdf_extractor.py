@@ -1,36 +1,35 @@
+import argparse
 import re
 import os
-import boto3
-import fitz  # PyMuPDF
+import json
+import hashlib
+import multiprocessing
 import psycopg2
-from psycopg2.extras import execute_batch
-from datetime import datetime
-from dotenv import load_dotenv
+from psycopg2.extras import execute_values, Json
+from datetime import datetime, timedelta
+# Also loads .env and the database configuration
+from Fastapi.db import SHARD_DSNS, CHANGE_CHANNEL, db_config, shard_for_account
 
-# Load environment variables from .env file
-load_dotenv()
+# boto3, PyMuPDF and numpy (Fastapi.sketches) are imported where they are first
+# used: jobs that only need the categoriser, and --parse runs, never load them
 
 # -------------------------------------------------
-# Initialize Bucket and S3 client
+# Initialize Bucket and S3 client (created on first use)
 # -------------------------------------------------
 
 AWS_REGION = os.getenv("AWS_REGION")
 BUCKET_NAME = os.getenv("BUCKET_NAME")
 BUCKET_PREFIX = os.getenv("BUCKET_PREFIX")
 
-s3 = boto3.client("s3", region_name=AWS_REGION)
+_s3 = None
 
-# -------------------------------------------------
-# DATABASE CONFIGURATION
-# -------------------------------------------------
 
-db_config = {
-    "host": os.getenv("DB_HOST"),
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "port": os.getenv("DB_PORT", 5432)
-}
+def get_s3():
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client("s3", region_name=AWS_REGION)
+    return _s3
 
 # -------------------------------------------------
 # Transaction Categories
@@ -102,6 +101,28 @@ TRANSACTION_CATEGORIES = {
 }
 
 
+# Rules are matched in order, so the hash covers insertion order as well as content
+CATEGORY_RULES_HASH = hashlib.sha256(json.dumps(TRANSACTION_CATEGORIES).encode()).hexdigest()
+
+# Version numbers are per database: every shard registers the ruleset itself
+_category_versions = {}
+
+
+def get_category_version(cursor):
+    # Registers the current ruleset on first use and returns its version number.
+    # The version is cached, so callers commit the registration before anything can roll it back
+    dsn = cursor.connection.dsn
+    if dsn not in _category_versions:
+        cursor.execute("""
+            INSERT INTO category_rulesets (rules_hash, rules)
+            VALUES (%s, %s)
+            ON CONFLICT (rules_hash) DO NOTHING
+            """, (CATEGORY_RULES_HASH, Json(TRANSACTION_CATEGORIES)))
+        cursor.execute("SELECT version FROM category_rulesets WHERE rules_hash = %s", (CATEGORY_RULES_HASH,))
+        _category_versions[dsn] = cursor.fetchone()[0]
+    return _category_versions[dsn]
+
+
 def categorize_transaction(description):
 
     desc_upper = description.upper()
@@ -132,9 +153,15 @@ def safe_search(pattern, text, flags=0):
 # -------------------------------------------------
 def extract_text_from_pdf(bucket, key):
 
-    obj = s3.get_object(Bucket=bucket, Key=key)
+    obj = get_s3().get_object(Bucket=bucket, Key=key)
     pdf= obj['Body'].read()
 
+    return pdf_bytes_to_text(pdf)
+
+
+def pdf_bytes_to_text(pdf):
+    import fitz  # PyMuPDF
+
     with fitz.open(stream=pdf, filetype="pdf") as pdf:
         text = "\n".join(page.get_text() for page in pdf)
 
@@ -143,8 +170,22 @@ def extract_text_from_pdf(bucket, key):
 # -------------------------------------------------
 # Parse Account Info (EXTRACT ACCOUNT INFO. FROM PDF USING REGEX)
 # -------------------------------------------------
+
+# Patterns stay linear in the size of the text (benchmarks/regex_bench.py): a
+# captured field is limited to one line of at most FIELD_MAX_CHARS, so a label
+# whose terminator never follows costs one bounded scan, not a scan to the end
+FIELD_MAX_CHARS = 120
+
+# The name line(s) just above the transaction table; [A-Za-z .] cannot cross lines
+HOLDER_NAME_PATTERN = re.compile(r"\n([A-Za-z .]+)\n\1?\n\nDate\nTransaction Description")
+
+
+def field_pattern(label, next_label):
+    return rf"{label}:\s*([^\n]{{0,{FIELD_MAX_CHARS}}}?)\s+{next_label}:"
+
+
 def extract_holder_name(text):
-    pattern = re.search(r"\n([A-Za-z\s\.]+)\n\1?\n\nDate\nTransaction Description", text)
+    pattern = HOLDER_NAME_PATTERN.search(text)
     return pattern.group(1).strip() if pattern else ""
 
 
@@ -152,25 +193,45 @@ def parse_account_info(text):
     return {
         "account_number": safe_search(r"Account Number:\s*(\d+)", text),
         "holder_name": extract_holder_name(text),
-        "account_type": safe_search(r"Account Type:\s*(.*?)\s+IFSC Code:", text, flags=re.DOTALL),
+        "account_type": safe_search(field_pattern("Account Type", "IFSC Code"), text),
         "ifsc_code": safe_search(r"IFSC Code:\s*(\w+)", text),
-        "branch": safe_search(r"Branch:\s*(.*?)\s+Statement Period:", text, flags=re.DOTALL),
+        "branch": safe_search(field_pattern("Branch", "Statement Period"), text),
         "customer_id": safe_search(r"Customer ID:\s*(\w+)", text),
-        "statement_period": safe_search(r"Statement Period:\s*(.*?)\s+Customer ID:", text, flags=re.DOTALL)
+        "statement_period": safe_search(field_pattern("Statement Period", "Customer ID"), text)
     }
 
 # -------------------------------------------------
 # Parse Account Summary (EXTRACT ACCOUNT SUMMARY FROM PDF USING REGEX)
 # -------------------------------------------------
+
+# Optional currency sign between label and amount; written so that a whitespace
+# run can only be split one way
+AMOUNT_AFTER_LABEL = r"\n\s*(?:[A-Za-z₹■]\s*)?(-?[\d,]+\.\d+)"
+
+
 def parse_account_summary(text):
     return {
-        "opening_balance": safe_search(r"Opening Balance\s*\n\s*[A-Za-z₹■]?\s*(-?[\d,]+\.\d+)", text),
-        "total_credits": safe_search(r"Total Credits.*?\n\s*[A-Za-z₹■]?\s*(-?[\d,]+\.\d+)", text),
-        "total_debits": safe_search(r"Total Debits.*?\n\s*[A-Za-z₹■]?\s*(-?[\d,]+\.\d+)", text),
-        "closing_balance": safe_search(r"Closing Balance\s*\n\s*[A-Za-z₹■]?\s*(-?[\d,]+\.\d+)", text),
-        "total_transactions": safe_search(r"Total Transactions\s*\n\s*(\d+)", text)
+        "opening_balance": safe_search(r"Opening Balance[ \t]*" + AMOUNT_AFTER_LABEL, text),
+        "total_credits": safe_search(r"Total Credits[^\n]*" + AMOUNT_AFTER_LABEL, text),
+        "total_debits": safe_search(r"Total Debits[^\n]*" + AMOUNT_AFTER_LABEL, text),
+        "closing_balance": safe_search(r"Closing Balance[ \t]*" + AMOUNT_AFTER_LABEL, text),
+        "total_transactions": safe_search(r"Total Transactions[ \t]*\n\s*(\d+)", text)
     }
 
+# Last date in the statement period ("01-01-2024 to 31-03-2024" or "01 Jan 2024 - 31 Mar 2024" -> 2024-03-31)
+def parse_period_end(statement_period):
+    dates = re.findall(r"\d{1,2}[-/ ](?:\d{2}|[A-Za-z]{3,9})[-/ ]\d{4}", statement_period)
+    if not dates:
+        return None
+
+    last = re.sub(r"[-/ ]", "-", dates[-1])
+    for fmt in ("%d-%m-%Y", "%d-%b-%Y", "%d-%B-%Y"):
+        try:
+            return datetime.strptime(last, fmt).date()
+        except ValueError:
+            continue
+    return None
+
 # -------------------------------------------------
 # Parse Transactions (EXTRACT ALL TRANSACTION DETAILS FROM PDF WITH CATEGORIES)
 # -------------------------------------------------
@@ -188,22 +249,28 @@ def safe_int(value):
     except:
         return 0
     
-def parse_transactions(text):
+# Longest description kept together with its row, wrapped lines included
+DESCRIPTION_MAX_CHARS = 300
 
-    pattern = re.compile(
-        r"(\d{2}-\d{2}-\d{4})\s+"  # Date
-        r"(.+?)\s+"  # Transaction Description
-        r"([A-Z0-9]+)\s+"  # Reference Number
-        r"(DR|CR)\s+"  # Transaction Type
-        r"(-?[\d,]+\.\d+)\s+"  # Amount 
-        r"(-?[\d,]+\.\d+)",  # Balance
-        
-        re.DOTALL
-    )
+TRANSACTION_PATTERN = re.compile(
+    r"(\d{2}-\d{2}-\d{4})\s+"  # Date
+    # Transaction Description: may wrap, but never runs into the next dated line,
+    # so a malformed row (or a dd-mm-yyyy statement period) cannot swallow the rows after it
+    rf"((?:(?!\n\d{{2}}-\d{{2}}-\d{{4}}\s).){{1,{DESCRIPTION_MAX_CHARS}}}?)\s+"
+    r"([A-Z0-9]+)\s+"  # Reference Number
+    r"(DR|CR)\s+"  # Transaction Type
+    r"(-?[\d,]+\.\d+)\s+"  # Amount 
+    r"(-?[\d,]+\.\d+)",  # Balance
+
+    re.DOTALL
+)
+
+
+def parse_transactions(text):
 
     rows = []
     
-    for m in pattern.finditer(text):
+    for m in TRANSACTION_PATTERN.finditer(text):
         try:
             txn_date = datetime.strptime(m.group(1), "%d-%m-%Y").date()
             desc = m.group(2).strip()
@@ -221,7 +288,7 @@ def parse_transactions(text):
             debit = amount if txn_type == "DR" else 0.0
             credit = amount if txn_type == "CR" else 0.0
 
-            rows.append((txn_date, desc, ref, txn_type, debit, credit, category))
+            rows.append((txn_date, desc, ref, txn_type, debit, credit, category, balance))
         
         except Exception as e:
             print("Error parsing transaction row:", e)
@@ -229,11 +296,87 @@ def parse_transactions(text):
     
     return rows
 
+
+def parse_statement(text):
+    return parse_account_info(text), parse_account_summary(text), parse_transactions(text)
+
+# -------------------------------------------------
+# PARSE UNDER A TIME BUDGET
+# A running regex cannot be interrupted, so run_extraction parses statements in a
+# child process and kills (and replaces) it when a file overruns its budget. The
+# file is quarantined and the run moves on. 0 parses in-process, without a budget.
+# -------------------------------------------------
+
+PARSE_TIME_BUDGET_S = float(os.getenv("PARSE_TIME_BUDGET_S", 10))
+
+
+class ParseFailed(Exception):
+    pass
+
+
+def _parse_worker(conn):
+    while True:
+        text = conn.recv()
+        if text is None:
+            return
+        try:
+            conn.send((True, parse_statement(text)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class StatementParser:
+
+    def __init__(self, budget_s=PARSE_TIME_BUDGET_S):
+        self.budget_s = budget_s
+        self._start()
+
+    def _start(self):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_parse_worker, args=(child_conn,),
+                                                name="statement-parser", daemon=True)
+        self._process.start()
+        child_conn.close()
+
+    def _restart(self):
+        self._process.kill()
+        self._process.join()
+        self._conn.close()
+        self._start()
+
+    def parse(self, text):
+        self._conn.send(text)
+        if not self._conn.poll(self.budget_s):
+            self._restart()
+            raise ParseFailed(f"parse took longer than {self.budget_s:g}s")
+        try:
+            ok, result = self._conn.recv()
+        except EOFError:
+            self._process.join()
+            exitcode = self._process.exitcode
+            self._restart()
+            raise ParseFailed(f"parser process died (exit code {exitcode})")
+
+        if not ok:
+            # An ordinary parser bug: fails the file like any other ingestion error
+            raise RuntimeError(f"Parser error: {result}")
+        return result
+
+    def close(self):
+        self._conn.send(None)
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.kill()
+        self._conn.close()
+
 # -------------------------------------------------
 # DATABASE CONNECTION
 # -------------------------------------------------
 
-def get_conn():
+# Shard 0 (or the only database) also holds processed_files and the branch/city dimensions
+def get_conn(shard=0):
+    if SHARD_DSNS:
+        return psycopg2.connect(SHARD_DSNS[shard])
     return psycopg2.connect(**db_config)
 
 # -------------------------------------------------
@@ -248,34 +391,138 @@ def is_file_processed(cursor, key):
 # MARK FILE AS PROCESSED
 # -------------------------------------------------
 
-def mark_file_as_processed(cursor, key):
-    cursor.execute("INSERT INTO processed_files (file_name) VALUES (%s)", (key,))
+def is_file_quarantined(cursor, key):
+    cursor.execute("SELECT 1 FROM quarantined_files WHERE file_name = %s", (key,))
+    return cursor.fetchone() is not None
+
+
+def quarantine_file(cursor, key, reason):
+    cursor.execute("""
+        INSERT INTO quarantined_files (file_name, reason) VALUES (%s, %s)
+        ON CONFLICT (file_name) DO UPDATE SET reason = EXCLUDED.reason, quarantined_at = NOW()
+        """, (key, reason))
+
+
+def mark_file_as_processed(cursor, key, stats):
+    cursor.execute("""
+        INSERT INTO processed_files (file_name, transactions_inserted, duplicates_dropped, balance_gaps)
+        VALUES (%s, %s, %s, %s)
+        """, (key, stats["inserted"], stats["duplicates"], stats["balance_gaps"]))
+
+# -------------------------------------------------
+# PUBLISH CHANGE EVENT (NOTIFY is only delivered when the main database commits)
+# -------------------------------------------------
+
+def publish_change(cursor, key, stats):
+    cursor.execute("""
+        SELECT pg_notify(%s, json_build_object(
+            'type', 'statement',
+            'file', %s::text,
+            'account', %s::text,
+            'branch', b.name,
+            'city', c.name,
+            'months', %s::text[],
+            'inserted', %s::int
+        )::text)
+        FROM (SELECT 1) one
+        LEFT JOIN branches b ON b.id = %s
+        LEFT JOIN cities c ON c.id = b.city_id
+        """, (CHANGE_CHANNEL, key, stats["account_number"], stats["months"], stats["inserted"], stats["branch_id"]))
+
+# -------------------------------------------------
+# CHECK RUNNING BALANCES AGAINST THE ACCOUNT SUMMARY
+# -------------------------------------------------
+
+BALANCE_TOLERANCE = 0.01
+
+def check_running_balances(opening_balance, closing_balance, transactions):
+    gaps = []
+    expected = opening_balance
+
+    # Statement order: each row's balance is the previous balance plus its credit minus its debit
+    for txn_date, _, ref, _, debit, credit, _, balance in transactions:
+        expected = round(expected + credit - debit, 2)
+        if abs(expected - balance) > BALANCE_TOLERANCE:
+            gaps.append(f"{txn_date} {ref}: expected balance {expected:,.2f}, statement shows {balance:,.2f}")
+            # Continue from the stated balance so one missing row is reported once
+            expected = balance
+
+    if transactions and abs(transactions[-1][7] - closing_balance) > BALANCE_TOLERANCE:
+        gaps.append(f"closing balance {closing_balance:,.2f}, last transaction shows {transactions[-1][7]:,.2f}")
+
+    return gaps
+
+
+# -------------------------------------------------
+# BRANCH / CITY DIMENSIONS (added the first time a branch is seen)
+# -------------------------------------------------
+
+def get_branch_id(cursor, branch):
+    if not branch:
+        return None
+
+    cursor.execute("SELECT id FROM branches WHERE name = %s", (branch,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+
+    city = branch.split(" - ")[0]
+    cursor.execute("INSERT INTO cities (name) VALUES (%s) ON CONFLICT (name) DO NOTHING", (city,))
+    cursor.execute("""
+        INSERT INTO branches (name, city_id)
+        SELECT %s, id FROM cities WHERE name = %s
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id
+        """, (branch, city))
+    return cursor.fetchone()[0]
+
+
+# Copy a branch and its city to a shard under the main database's ids
+def replicate_branch(cursor, shard_cursor, branch_id):
+    if branch_id is None:
+        return
+
+    cursor.execute("""
+        SELECT b.name, c.id, c.name
+        FROM branches b
+        JOIN cities c ON c.id = b.city_id
+        WHERE b.id = %s
+        """, (branch_id,))
+    branch, city_id, city = cursor.fetchone()
+
+    shard_cursor.execute("INSERT INTO cities (id, name) VALUES (%s, %s) ON CONFLICT DO NOTHING", (city_id, city))
+    shard_cursor.execute("""
+        INSERT INTO branches (id, name, city_id) VALUES (%s, %s, %s)
+        ON CONFLICT DO NOTHING
+        """, (branch_id, branch, city_id))
 
 
 # -------------------------------------------------
 # PROCESS PDF FILE
 # -------------------------------------------------
 
-def process_pdf(key, cursor):
+def process_pdf(key, cursor, shard_cursors=None, parser=None):
     print(f"Processing file: {key}")
 
     # Extract text from PDF
     text = extract_text_from_pdf(BUCKET_NAME, key)
 
-    # Account Info 
-    acc_info = parse_account_info(text)
-
-    # Account Summary 
-    acc_summary = parse_account_summary(text)
+    # Account info, summary and transactions (within the time budget when given a parser)
+    acc_info, acc_summary, transactions = parser.parse(text) if parser else parse_statement(text)
 
-    # Transactions
-    transactions = parse_transactions(text)
+    # Branch ids are assigned by the main database; everything below goes to the account's shard
+    branch_id = get_branch_id(cursor, acc_info["branch"])
 
+    if shard_cursors:
+        shard_cursor = shard_cursors[shard_for_account(acc_info["account_number"])]
+        if shard_cursor is not cursor:
+            replicate_branch(cursor, shard_cursor, branch_id)
+        cursor = shard_cursor
 
     # Insert account info 
     cursor.execute("""
-        INSERT INTO account_info (account_number, holder_name, account_type, ifsc_code, branch, customer_id, statement_period)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        INSERT INTO account_info (account_number, holder_name, account_type, ifsc_code, branch, customer_id, statement_period, branch_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                     
         ON CONFLICT (account_number) DO NOTHING
         """, (
@@ -285,48 +532,197 @@ def process_pdf(key, cursor):
         acc_info["ifsc_code"],
         acc_info["branch"],
         acc_info["customer_id"],
-        acc_info["statement_period"]
+        acc_info["statement_period"],
+        branch_id
     ))
 
-    # INSERT ACCOUNT SUMMARY 
-    cursor.execute("""
-        INSERT INTO account_summary (
-            account_number, opening_balance, total_credits,
-            total_debits, closing_balance, total_transactions
-        )
-        VALUES (%s,%s,%s,%s,%s,%s)
-    """, (
+    # INSERT ACCOUNT SUMMARY (one row per account and statement period; re-uploads replace it)
+    summary = (
         acc_info["account_number"],
+        acc_info["statement_period"],
+        parse_period_end(acc_info["statement_period"]),
         safe_float(acc_summary["opening_balance"].replace(",", "")),
         safe_float(acc_summary["total_credits"].replace(",", "")),
         safe_float(acc_summary["total_debits"].replace(",", "")),
         safe_float(acc_summary["closing_balance"].replace(",", "")),
         safe_int(acc_summary["total_transactions"])
-    ))
+    )
 
-    # INSERT TRANSACTIONS
-    execute_batch(cursor, """
+    cursor.execute("""
+        INSERT INTO account_summary (
+            account_number, statement_period, period_end, opening_balance,
+            total_credits, total_debits, closing_balance, total_transactions
+        )
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        ON CONFLICT (account_number, statement_period) DO UPDATE SET
+            period_end = EXCLUDED.period_end,
+            opening_balance = EXCLUDED.opening_balance,
+            total_credits = EXCLUDED.total_credits,
+            total_debits = EXCLUDED.total_debits,
+            closing_balance = EXCLUDED.closing_balance,
+            total_transactions = EXCLUDED.total_transactions
+        RETURNING id
+    """, summary)
+
+    summary_id = cursor.fetchone()[0]
+
+    # UPDATE CURRENT SUMMARY POINTER (only when this statement is the newest seen)
+    cursor.execute("""
+        INSERT INTO account_summary_current (
+            account_number, statement_period, period_end, opening_balance,
+            total_credits, total_debits, closing_balance, total_transactions, summary_id
+        )
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        ON CONFLICT (account_number) DO UPDATE SET
+            summary_id = EXCLUDED.summary_id,
+            statement_period = EXCLUDED.statement_period,
+            period_end = EXCLUDED.period_end,
+            opening_balance = EXCLUDED.opening_balance,
+            total_credits = EXCLUDED.total_credits,
+            total_debits = EXCLUDED.total_debits,
+            closing_balance = EXCLUDED.closing_balance,
+            total_transactions = EXCLUDED.total_transactions,
+            updated_at = NOW()
+        WHERE account_summary_current.period_end IS NULL
+            OR EXCLUDED.period_end >= account_summary_current.period_end
+    """, (*summary, summary_id))
+
+    # INSERT TRANSACTIONS (rows already stored from an overlapping statement are skipped)
+    category_version = get_category_version(cursor)
+
+    inserted = execute_values(cursor, """
         INSERT INTO transactions (
             account_number, transaction_date, description,
             reference, transaction_type, debit_amount,
-            credit_amount, category
+            credit_amount, category, balance, category_version
         )
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        VALUES %s
+        ON CONFLICT (account_number, reference, transaction_date, debit_amount, credit_amount) DO NOTHING
+        RETURNING transaction_date, reference, debit_amount, credit_amount
     """, [
-        (acc_info["account_number"], *t) for t in transactions
-    ])
+        (acc_info["account_number"], *t, category_version) for t in transactions
+    ], page_size=1000, fetch=True)
+
+    # Rows missing from the parse (or misread amounts) show up as breaks in the running balance
+    gaps = check_running_balances(summary[3], summary[6], transactions)
+    for gap in gaps:
+        print(f"Balance gap in {key}: {gap}")
+
+    stats = {
+        "inserted": len(inserted),
+        "duplicates": len(transactions) - len(inserted),
+        "balance_gaps": len(gaps),
+    }
+
+    if stats["duplicates"]:
+        print(f"Dropped {stats['duplicates']} duplicate transactions from {key}")
+
+    new_months = {row[0].replace(day=1) for row in inserted}
+    update_branch_sketches(cursor, acc_info["branch"], acc_info["account_number"], transactions, inserted, summary[2])
+
+    # Carried to publish_change, which runs on the main database
+    stats["account_number"] = acc_info["account_number"]
+    stats["branch_id"] = branch_id
+    stats["months"] = sorted(month.isoformat() for month in new_months)
+
+    return stats
+
+# -------------------------------------------------
+# UPDATE BRANCH x MONTH SKETCHES
+# -------------------------------------------------
+
+def update_branch_sketches(cursor, branch, account_number, transactions, inserted, period_end):
+    if not branch or not transactions:
+        return
+
+    from Fastapi.sketches import HyperLogLog, TDigest
+
+    # Month-end balance: the stated balance after the month's last transaction
+    month_end = {}
+    last_row = {}
+    for t in transactions:
+        month = t[0].replace(day=1)
+        month_end[month] = t[7]
+        last_row[month] = (t[0], t[2])
+
+    # Exact totals of the rows this statement stored (overlapping rows were stored before)
+    new_rows = set()
+    totals = {}
+    for txn_date, reference, debit, credit in inserted:
+        new_rows.add((txn_date, reference))
+        count, debits, credits = totals.get(txn_date.replace(day=1), (0, 0, 0))
+        totals[txn_date.replace(day=1)] = (count + 1, debits + (debit or 0), credits + (credit or 0))
+
+    for month in sorted(month_end):
+        cursor.execute("""
+            SELECT customers_hll, balance_digest
+            FROM branch_month_sketches
+            WHERE branch = %s AND month = %s
+            FOR UPDATE
+            """, (branch, month))
+        row = cursor.fetchone()
+
+        customers = HyperLogLog(row[0] if row else None)
+        balances = TDigest(row[1] if row else None)
+
+        # Re-adding an account is a no-op for the HLL. A t-digest cannot take a value back,
+        # so the balance is added once: by the statement that reaches the month's last day
+        # and stores the month's last row. A statement ending mid-month leaves it to the next
+        customers.add(account_number)
+        last_day = (month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        if (period_end is None or period_end >= last_day) and last_row[month] in new_rows:
+            balances.update([month_end[month]])
+
+        count, debits, credits = totals.get(month, (0, 0, 0))
+        cursor.execute("""
+            INSERT INTO branch_month_sketches (branch, month, customers_hll, balance_digest,
+                transaction_count, debits, credits)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (branch, month) DO UPDATE SET
+                customers_hll = EXCLUDED.customers_hll,
+                balance_digest = EXCLUDED.balance_digest,
+                transaction_count = branch_month_sketches.transaction_count + EXCLUDED.transaction_count,
+                debits = branch_month_sketches.debits + EXCLUDED.debits,
+                credits = branch_month_sketches.credits + EXCLUDED.credits,
+                updated_at = NOW()
+            """, (branch, month, psycopg2.Binary(customers.to_bytes()), Json(balances.to_json()),
+                  count, debits, credits))
 
 # -------------------------------------------------
 # MAIN FUNCTION TO PROCESS ALL FILES IN S3 BUCKET
 # -------------------------------------------------
 
-def run_extraction():
-    print("Checking for new files in S3 bucket...")
+# Each file commits on its own, so a failing file does not discard the ones before it.
+# Statement shards first, processed_files last: a failure in between only means the
+# file is read again next run, and re-ingesting a statement is idempotent
+def commit_file(shard_conns):
+    for shard_conn in reversed(shard_conns):
+        shard_conn.commit()
+
+
+def run_extraction(keys=None):
+    print("Checking for new files in S3 bucket..." if not keys else f"Ingesting {len(keys)} given file(s)...")
+
+    # Started before any connection is opened, so the forked parser holds no database sockets
+    parser = StatementParser() if PARSE_TIME_BUDGET_S > 0 else None
 
     conn = get_conn()
     cursor = conn.cursor()
 
-    response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=BUCKET_PREFIX)
+    # One connection per shard; shard 0 is the main connection itself
+    shard_conns = [conn] + [get_conn(shard) for shard in range(1, len(SHARD_DSNS))]
+    shard_cursors = [cursor] + [shard_conn.cursor() for shard_conn in shard_conns[1:]]
+
+    # Registered and committed up front: a file that rolls back must not take the ruleset row
+    # with it while its version number stays cached
+    for shard_cursor in shard_cursors:
+        get_category_version(shard_cursor)
+    commit_file(shard_conns)
+
+    if keys:
+        response = {"Contents": [{"Key": key} for key in keys]}
+    else:
+        response = get_s3().list_objects_v2(Bucket=BUCKET_NAME, Prefix=BUCKET_PREFIX)
 
     process_count = 0
 
@@ -339,24 +735,74 @@ def run_extraction():
                 continue
 
             if not is_file_processed(cursor, key):
+                if is_file_quarantined(cursor, key):
+                    print(f"Skipping quarantined file: {key}")
+                    continue
+
                 try:
-                    process_pdf(key, cursor)
-                    mark_file_as_processed(cursor, key)
+                    stats = process_pdf(key, cursor, shard_cursors, parser)
+                    mark_file_as_processed(cursor, key, stats)
+                    publish_change(cursor, key, stats)
+                    commit_file(shard_conns)
                     print(f"Successfully processed: {key}")
                     process_count += 1
 
+                except ParseFailed as e:
+                    # Nothing was written for the file yet
+                    quarantine_file(cursor, key, str(e))
+                    conn.commit()
+                    print(f"Quarantined {key}: {e}")
+
                 except Exception as e:
-                    conn.rollback()
+                    for shard_conn in shard_conns:
+                        shard_conn.rollback()
                     print(f"Error processing {key}: {e}")
             else:
                 print(f"Already processed: {key}")
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+
+    for shard_cursor in shard_cursors:
+        shard_cursor.close()
+    for shard_conn in shard_conns:
+        shard_conn.close()
+    if parser:
+        parser.close()
 
     print(f"Processing complete. Total new files processed: {process_count}")
 
+    # Bring the columnar analytics snapshot up to date with what was just committed
+    if process_count and os.getenv("ANALYTICS_ENGINE", "postgres") == "columnar":
+        from Fastapi.analytics_store import refresh_snapshot
+        refresh_snapshot()
+
+# -------------------------------------------------
+# PARSE A LOCAL PDF (no S3 or database access)
+# -------------------------------------------------
+
+def parse_local_pdf(path):
+    with open(path, "rb") as f:
+        text = pdf_bytes_to_text(f.read())
+
+    acc_info, acc_summary, transactions = parse_statement(text)
+    print(json.dumps({
+        "account_info": acc_info,
+        "account_summary": acc_summary,
+        "transactions": [
+            dict(zip(("date", "description", "reference", "type", "debit", "credit", "category", "balance"), t))
+            for t in transactions
+        ],
+    }, indent=2, default=str))
+
+
 if __name__ == "__main__":
-    run_extraction()
+    parser = argparse.ArgumentParser(description="Ingest Axis Bank statement PDFs from S3 into Postgres.")
+    parser.add_argument("--key", action="append",
+                        help="Ingest this S3 key (repeatable) instead of listing BUCKET_PREFIX")
+    parser.add_argument("--parse", metavar="PDF",
+                        help="Parse a local statement PDF and print it as JSON, without S3 or the database")
+    args = parser.parse_args()
+
+    if args.parse:
+        parse_local_pdf(args.parse)
+    else:
+        run_extraction(keys=args.key)
 
@@ -0,0 +1,44 @@
+-- -------------------------------------------------
+-- BASE SCHEMA (tables written by pdf_extractor.process_pdf)
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS account_info (
+    account_number   VARCHAR(20) PRIMARY KEY,
+    holder_name      TEXT,
+    account_type     TEXT,
+    ifsc_code        VARCHAR(20),
+    branch           TEXT,
+    customer_id      VARCHAR(30),
+    statement_period TEXT
+);
+
+CREATE TABLE IF NOT EXISTS account_summary (
+    id                 SERIAL PRIMARY KEY,
+    account_number     VARCHAR(20) REFERENCES account_info (account_number),
+    opening_balance    NUMERIC(15, 2),
+    total_credits      NUMERIC(15, 2),
+    total_debits       NUMERIC(15, 2),
+    closing_balance    NUMERIC(15, 2),
+    total_transactions INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id               BIGSERIAL PRIMARY KEY,
+    account_number   VARCHAR(20) REFERENCES account_info (account_number),
+    transaction_date DATE,
+    description      TEXT,
+    reference        VARCHAR(50),
+    transaction_type VARCHAR(2),
+    debit_amount     NUMERIC(15, 2) DEFAULT 0,
+    credit_amount    NUMERIC(15, 2) DEFAULT 0,
+    category         VARCHAR(50)
+);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions (account_number);
+CREATE INDEX IF NOT EXISTS idx_account_summary_account ON account_summary (account_number);
+CREATE INDEX IF NOT EXISTS idx_account_info_branch ON account_info (branch);
+
+CREATE TABLE IF NOT EXISTS processed_files (
+    file_name    TEXT PRIMARY KEY,
+    processed_at TIMESTAMP DEFAULT NOW()
+);
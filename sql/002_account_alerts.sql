@@ -0,0 +1,14 @@
+-- -------------------------------------------------
+-- ACCOUNT ALERTS (written by jobs/alert_engine.py, read by customer_dashboard)
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS account_alerts (
+    account_number VARCHAR(20) REFERENCES account_info (account_number),
+    rule           VARCHAR(50),
+    rule_order     SMALLINT,
+    message        TEXT,
+    computed_at    TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (account_number, rule)
+);
+
+CREATE INDEX IF NOT EXISTS idx_account_alerts_rule ON account_alerts (rule);
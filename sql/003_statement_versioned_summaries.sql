@@ -0,0 +1,37 @@
+-- -------------------------------------------------
+-- STATEMENT-VERSIONED ACCOUNT SUMMARIES
+-- One account_summary row per (account, statement period); account_summary_current
+-- holds the latest one per account and is maintained by process_pdf.
+-- -------------------------------------------------
+
+ALTER TABLE account_summary ADD COLUMN IF NOT EXISTS statement_period TEXT;
+ALTER TABLE account_summary ADD COLUMN IF NOT EXISTS period_end DATE;
+
+-- Rows loaded before this migration have no period and are left as they are (NULLs never conflict)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_account_summary_period
+    ON account_summary (account_number, statement_period);
+
+CREATE TABLE IF NOT EXISTS account_summary_current (
+    account_number     VARCHAR(20) PRIMARY KEY REFERENCES account_info (account_number),
+    summary_id         INTEGER REFERENCES account_summary (id),
+    statement_period   TEXT,
+    period_end         DATE,
+    opening_balance    NUMERIC(15, 2),
+    total_credits      NUMERIC(15, 2),
+    total_debits       NUMERIC(15, 2),
+    closing_balance    NUMERIC(15, 2),
+    total_transactions INTEGER,
+    updated_at         TIMESTAMP DEFAULT NOW()
+);
+
+-- Backfill: newest statement per account, falling back to the last row inserted
+INSERT INTO account_summary_current (
+    account_number, summary_id, statement_period, period_end, opening_balance,
+    total_credits, total_debits, closing_balance, total_transactions
+)
+SELECT DISTINCT ON (account_number)
+    account_number, id, statement_period, period_end, opening_balance,
+    total_credits, total_debits, closing_balance, total_transactions
+FROM account_summary
+ORDER BY account_number, period_end DESC NULLS LAST, id DESC
+ON CONFLICT (account_number) DO NOTHING;
@@ -0,0 +1,13 @@
+-- -------------------------------------------------
+-- TRANSACTION NATURAL KEY
+-- Overlapping statements carry the same transactions; the natural key lets
+-- process_pdf skip them with ON CONFLICT DO NOTHING.
+-- On a database that already holds duplicates, run `python -m jobs.dedupe_transactions`
+-- instead of this file: it removes them in chunks and then builds the same index.
+-- -------------------------------------------------
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_transactions_natural_key
+    ON transactions (account_number, reference, transaction_date, debit_amount, credit_amount);
+
+ALTER TABLE processed_files ADD COLUMN IF NOT EXISTS transactions_inserted INTEGER;
+ALTER TABLE processed_files ADD COLUMN IF NOT EXISTS duplicates_dropped INTEGER;
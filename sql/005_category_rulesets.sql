@@ -0,0 +1,14 @@
+-- -------------------------------------------------
+-- VERSIONED CATEGORY RULESETS
+-- Every distinct TRANSACTION_CATEGORIES ruleset gets a version; each transaction
+-- records the version that categorised it so stale rows can be backfilled.
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS category_rulesets (
+    version    SERIAL PRIMARY KEY,
+    rules_hash CHAR(64) UNIQUE NOT NULL,
+    rules      JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS category_version INTEGER REFERENCES category_rulesets (version);
@@ -0,0 +1,19 @@
+-- -------------------------------------------------
+-- RECURRING PAYMENTS (written by jobs/recurring_payments.py, read by customer_dashboard)
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS recurring_payments (
+    account_number VARCHAR(20) REFERENCES account_info (account_number),
+    merchant       VARCHAR(100),
+    category       VARCHAR(50),
+    frequency      VARCHAR(20),
+    interval_days  NUMERIC(7, 1),
+    average_amount NUMERIC(15, 2),
+    occurrences    INTEGER,
+    first_date     DATE,
+    last_date      DATE,
+    next_expected  DATE,
+    confidence     NUMERIC(4, 3),
+    computed_at    TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (account_number, merchant, category)
+);
@@ -0,0 +1,18 @@
+-- -------------------------------------------------
+-- BRANCH x MONTH SKETCHES (maintained by pdf_extractor.process_pdf, rebuilt by
+-- jobs/build_sketches.py; merged up to city and bank level by the dashboards)
+--
+--   customers_hll   HyperLogLog registers of accounts with a transaction that month
+--   balance_digest  t-digest centroids [[mean, weight], ...] of month-end balances
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS branch_month_sketches (
+    branch         TEXT NOT NULL,
+    month          DATE NOT NULL,
+    customers_hll  BYTEA NOT NULL,
+    balance_digest JSONB NOT NULL DEFAULT '[]',
+    updated_at     TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (branch, month)
+);
+
+CREATE INDEX IF NOT EXISTS idx_branch_month_sketches_month ON branch_month_sketches (month);
@@ -0,0 +1,14 @@
+-- -------------------------------------------------
+-- RUNNING BALANCE PER TRANSACTION
+-- `balance` is the statement's balance after the row. The covering index answers
+-- balance-as-of-date and daily-balance queries with one index-only range scan.
+-- Rows loaded before this migration are filled by jobs/backfill_balances.py.
+-- -------------------------------------------------
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS balance NUMERIC(15, 2);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_account_date
+    ON transactions (account_number, transaction_date, id) INCLUDE (balance);
+
+-- Rows whose stated balance disagreed with the running total at ingestion
+ALTER TABLE processed_files ADD COLUMN IF NOT EXISTS balance_gaps INTEGER DEFAULT 0;
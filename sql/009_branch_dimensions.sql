@@ -0,0 +1,41 @@
+-- -------------------------------------------------
+-- BRANCH / CITY DIMENSIONS
+-- Small lookup tables behind the /branches and /cities dropdowns. process_pdf adds
+-- a row the first time it sees a branch; account_info references branches by id.
+-- account_info.branch keeps the text name for existing readers.
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS cities (
+    id   SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS branches (
+    id      SERIAL PRIMARY KEY,
+    name    TEXT UNIQUE NOT NULL,
+    city_id INTEGER NOT NULL REFERENCES cities (id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_branches_city ON branches (city_id);
+
+ALTER TABLE account_info ADD COLUMN IF NOT EXISTS branch_id INTEGER REFERENCES branches (id);
+
+CREATE INDEX IF NOT EXISTS idx_account_info_branch_id ON account_info (branch_id);
+
+-- Backfill from the branch names already stored ("City - Area")
+INSERT INTO cities (name)
+SELECT DISTINCT SPLIT_PART(branch, ' - ', 1)
+FROM account_info
+WHERE branch IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO branches (name, city_id)
+SELECT DISTINCT a.branch, c.id
+FROM account_info a
+JOIN cities c ON c.name = SPLIT_PART(a.branch, ' - ', 1)
+ON CONFLICT (name) DO NOTHING;
+
+UPDATE account_info a
+SET branch_id = b.id
+FROM branches b
+WHERE b.name = a.branch AND a.branch_id IS NULL;
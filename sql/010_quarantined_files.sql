@@ -0,0 +1,12 @@
+-- -------------------------------------------------
+-- QUARANTINED STATEMENTS
+-- Files whose parse ran past PARSE_TIME_BUDGET_S (pdf_extractor.run_extraction)
+-- or crashed the parser. Ingestion skips them on later runs; delete the row to
+-- have a file parsed again after fixing the parser.
+-- -------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS quarantined_files (
+    file_name      TEXT PRIMARY KEY,
+    reason         TEXT NOT NULL,
+    quarantined_at TIMESTAMP DEFAULT NOW()
+);
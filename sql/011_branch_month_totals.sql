@@ -0,0 +1,11 @@
+-- -------------------------------------------------
+-- EXACT MONTHLY TOTALS ON THE BRANCH x MONTH SKETCHES
+-- Added to by pdf_extractor.process_pdf for the rows each statement inserts and
+-- rebuilt by jobs/build_sketches.py. branch_dashboard reads them instead of
+-- scanning the branch's transactions once every month of the branch has them;
+-- rows built before this migration stay NULL until the sketches are rebuilt.
+-- -------------------------------------------------
+
+ALTER TABLE branch_month_sketches ADD COLUMN IF NOT EXISTS transaction_count BIGINT;
+ALTER TABLE branch_month_sketches ADD COLUMN IF NOT EXISTS debits NUMERIC(18, 2);
+ALTER TABLE branch_month_sketches ADD COLUMN IF NOT EXISTS credits NUMERIC(18, 2);